@@ -158,6 +158,11 @@ class Database:
         self._filters.append((column, "<", value))
         return self
     
+    def in_(self, column: str, values: List[Any]):
+        """Add membership filter (values must not be empty)."""
+        self._filters.append((column, "IN", tuple(values)))
+        return self
+    
     def order(self, column: str, desc: bool = False):
         """Add ordering."""
         direction = "DESC" if desc else "ASC"
@@ -239,6 +244,16 @@ class Database:
                     params.append(val)
                 query += " WHERE " + " AND ".join(conditions)
             
+            # With count="exact" only the affected row count is returned
+            if self._count_mode == "exact":
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(query, params)
+                    count = cursor.rowcount
+                    cursor.close()
+                
+                return type('Response', (), {'data': [], 'count': count})()
+            
             query += " RETURNING *"
             
             with get_db_connection() as conn:
@@ -312,9 +327,10 @@ class Database:
         self._pending_update = data
         return self
     
-    def delete(self):
-        """Delete data from table. Returns self for .execute() chaining."""
+    def delete(self, count: str = None):
+        """Delete data from table with optional count mode. Returns self for .execute() chaining."""
         self._pending_delete = True
+        self._count_mode = count
         return self
 
 
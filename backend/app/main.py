@@ -8,7 +8,7 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.routers import upload, analysis, chat, results, test
+from app.routers import upload, analysis, chat, results, test, batch
 
 
 @asynccontextmanager
@@ -54,6 +54,7 @@ app.include_router(analysis.router)
 app.include_router(chat.router)
 app.include_router(results.router)
 app.include_router(test.router)
+app.include_router(batch.router)
 
 
 @app.get("/")
@@ -289,3 +289,30 @@ class ErrorResponse(BaseModel):
     message: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class BatchRequestItem(BaseModel):
+    """A single sub-request inside a batch."""
+    
+    method: str = Field("GET", description="HTTP method (only GET is supported)")
+    path: str = Field(..., description="API path including query string, e.g. /api/results?page=1")
+
+
+class BatchRequest(BaseModel):
+    """Request model for executing several read-only API calls at once."""
+    
+    requests: List[BatchRequestItem] = Field(..., min_length=1, max_length=20, description="Sub-requests to run")
+
+
+class BatchResponseItem(BaseModel):
+    """Result of one sub-request, in request order."""
+    
+    status: int = Field(..., description="HTTP status code")
+    body: Any = Field(None, description="Decoded JSON body (raw text if not JSON)")
+    duration_ms: float = Field(..., description="Time spent serving this sub-request")
+
+
+class BatchResponse(BaseModel):
+    """Response model for a batch request."""
+    
+    responses: List[BatchResponseItem] = Field(..., description="Sub-request results")
@@ -3,10 +3,12 @@ Analysis API Router
 Endpoints for video analysis and result retrieval.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Path as PathParam
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header, Path as PathParam, Query
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+import asyncio
 import logging
+import time
 from datetime import datetime
 import uuid
 import json
@@ -25,6 +27,28 @@ analysis_service: Optional[VideoAnalysisService] = None
 # In-memory storage for analysis progress (in production, use Redis or database)
 analysis_progress: Dict[str, Dict] = {}
 
+# (video_id, analysis_id) started in this process, by client-supplied
+# Idempotency-Key; the oldest keys are dropped beyond MAX_IDEMPOTENCY_KEYS
+analysis_by_idempotency_key: Dict[str, Tuple[str, str]] = {}
+MAX_IDEMPOTENCY_KEYS = 1000
+
+# How often a long-polling status request re-checks analysis_progress (seconds)
+LONG_POLL_INTERVAL = 0.25
+
+
+async def wait_for_analysis_finish(analysis_id: str, timeout: float):
+    """
+    Wait until an in-process analysis completes or fails, or timeout expires.
+    
+    Analyses not tracked in analysis_progress return immediately.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        progress_data = analysis_progress.get(analysis_id)
+        if progress_data is None or progress_data["status"] in ("completed", "failed"):
+            return
+        await asyncio.sleep(LONG_POLL_INTERVAL)
+
 
 def get_analysis_service(
     show_visual: bool = False,
@@ -256,7 +280,8 @@ async def run_video_analysis(
 async def start_analysis(
     video_id: str = PathParam(..., description="ID of the uploaded video"),
     request: AnalysisRequest = None,
-    background_tasks: BackgroundTasks = BackgroundTasks()
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Start video analysis for an uploaded video.
@@ -268,6 +293,8 @@ async def start_analysis(
     - **save_annotated_video**: Save video with bounding boxes to file (default: False)
     - **frame_sample_rate**: Process every Nth frame (default: 30, use 1 for all frames)
     - **confidence_threshold**: Detection confidence threshold 0.0-1.0 (default: 0.5)
+    - **Idempotency-Key** header: Repeating a key returns the analysis it started
+      (unless that analysis failed) instead of starting a new one
     
     Returns:
     - **analysis_id**: Unique ID for this analysis
@@ -277,6 +304,24 @@ async def start_analysis(
     Note: Visual display (show_visual=True) only works when running locally, not in production API.
     """
     try:
+        # Same key as an earlier request: hand back that analysis
+        stored = analysis_by_idempotency_key.get(idempotency_key) if idempotency_key else None
+        if stored:
+            existing_video_id, existing_id = stored
+            if existing_video_id != video_id:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Idempotency-Key was already used for video {existing_video_id}"
+                )
+            existing = analysis_progress.get(existing_id)
+            if existing and existing["status"] != "failed":
+                return {
+                    "analysis_id": existing_id,
+                    "video_id": existing_video_id,
+                    "status": existing["status"],
+                    "message": "Existing analysis returned for this Idempotency-Key."
+                }
+        
         # Use request body if provided, otherwise use defaults
         if request is None:
             request = AnalysisRequest(upload_id=video_id)
@@ -312,6 +357,12 @@ async def start_analysis(
             "save_annotated": request.save_annotated_video
         }
         
+        if idempotency_key:
+            analysis_by_idempotency_key.pop(idempotency_key, None)
+            analysis_by_idempotency_key[idempotency_key] = (video_id, analysis_id)
+            while len(analysis_by_idempotency_key) > MAX_IDEMPOTENCY_KEYS:
+                analysis_by_idempotency_key.pop(next(iter(analysis_by_idempotency_key)))
+        
         # Start background task with visual options and hospital context
         background_tasks.add_task(
             run_video_analysis,
@@ -353,12 +404,16 @@ async def start_analysis(
 
 @router.get("/status/{analysis_id}", response_model=AnalysisStatusResponse)
 async def get_analysis_status(
-    analysis_id: str = PathParam(..., description="ID of the analysis")
+    analysis_id: str = PathParam(..., description="ID of the analysis"),
+    wait: bool = Query(False, description="Long-poll until the analysis completes or fails"),
+    timeout: float = Query(30, ge=0, le=300, description="Maximum long-poll wait in seconds")
 ):
     """
     Get the status and progress of an ongoing analysis.
     
     - **analysis_id**: ID returned from POST /analyze/{video_id}
+    - **wait**: Hold the request until the analysis finishes (up to **timeout** seconds)
+      instead of returning the current progress
     
     Returns:
     - **status**: Current status (queued, processing, completed, failed)
@@ -367,6 +422,9 @@ async def get_analysis_status(
     - **result**: Full analysis results (only when completed)
     """
     try:
+        if wait:
+            await wait_for_analysis_finish(analysis_id, timeout)
+        
         # Check in-memory progress first
         if analysis_id in analysis_progress:
             progress_data = analysis_progress[analysis_id]
@@ -525,6 +583,9 @@ async def delete_analysis(
         # Remove from in-memory progress
         if analysis_id in analysis_progress:
             del analysis_progress[analysis_id]
+        for key, (_, keyed_analysis_id) in list(analysis_by_idempotency_key.items()):
+            if keyed_analysis_id == analysis_id:
+                del analysis_by_idempotency_key[key]
         
         logger.info(f"Analysis deleted: {analysis_id}")
         
@@ -0,0 +1,54 @@
+"""
+Batch API Router
+Runs several read-only API calls in one HTTP round trip.
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.models import BatchRequest, BatchRequestItem, BatchResponse
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/batch", tags=["Batch"])
+
+
+async def _dispatch(client: httpx.AsyncClient, item: BatchRequestItem) -> dict:
+    """Serve one sub-request in-process and capture its result"""
+    start = time.perf_counter()
+    response = await client.request(item.method, item.path)
+    duration_ms = (time.perf_counter() - start) * 1000
+    
+    try:
+        body = response.json()
+    except ValueError:
+        body = response.text
+    
+    return {"status": response.status_code, "body": body, "duration_ms": round(duration_ms, 2)}
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(batch: BatchRequest, request: Request):
+    """
+    Execute several GET requests against this API concurrently.
+    
+    Sub-requests are served in-process (no extra connections) and their
+    results are returned in request order. Only GET requests to /api/
+    paths are allowed, and batches cannot be nested.
+    
+    - **requests**: List of {method, path} sub-requests (max 20)
+    """
+    for item in batch.requests:
+        if item.method.upper() != "GET":
+            raise HTTPException(status_code=400, detail=f"Only GET is supported in batches: {item.method}")
+        if not item.path.startswith("/api/") or item.path.startswith(router.prefix):
+            raise HTTPException(status_code=400, detail=f"Invalid batch path: {item.path}")
+    
+    transport = httpx.ASGITransport(app=request.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://batch") as client:
+        responses = await asyncio.gather(*(_dispatch(client, item) for item in batch.requests))
+    
+    return {"responses": responses}
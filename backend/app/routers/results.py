@@ -3,10 +3,12 @@ Results API Router - Phase 7
 Handles retrieval, listing, search, and export of analysis results
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -38,7 +40,10 @@ setup_cleanup_endpoints(router)
 # ============================================================================
 
 @router.get("/{analysis_id}", response_model=Dict[str, Any])
-async def get_analysis_result(analysis_id: str):
+async def get_analysis_result(
+    analysis_id: str,
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Retrieve a specific analysis result by ID
     
@@ -52,8 +57,12 @@ async def get_analysis_result(analysis_id: str):
     - AI insights (if available)
     - Enhanced analytics
     
+    Responses carry an ETag; a request whose If-None-Match matches it gets
+    304 Not Modified with no body.
+    
     Args:
         analysis_id: The unique identifier of the analysis
+        if_none_match: ETag from an earlier response
         
     Returns:
         Complete analysis result dictionary
@@ -83,14 +92,21 @@ async def get_analysis_result(analysis_id: str):
         if isinstance(result.get('results'), str):
             result['results'] = json.loads(result['results'])
         
-        return {
+        response = JSONResponse(jsonable_encoder({
             "analysis_id": result['id'],
             "video_id": result.get('video_id'),
             "video_name": result.get('video_name'),
             "created_at": result.get('created_at'),
             "status": result.get('status', 'completed'),
             "results": result['results']
-        }
+        }))
+        etag = f'"{hashlib.sha256(response.body).hexdigest()[:32]}"'
+        
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        response.headers["ETag"] = etag
+        return response
         
     except HTTPException:
         raise
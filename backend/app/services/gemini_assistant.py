@@ -3,10 +3,20 @@ Gemini AI Assistant Service
 Integrates Google Gemini API for generating insights and recommendations.
 """
 
+import copy
+import functools
+import hashlib
+import itertools
 import logging
+import os
+import re
+import threading
+import time
 from typing import Dict, List, Optional, Any
 import json
+from collections import OrderedDict
 from datetime import datetime
+from string import Template
 
 try:
     import google.generativeai as genai
@@ -17,6 +27,336 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Insights for identical analysis payloads are served from an exact-match LRU cache
+RESULT_CACHE_SIZE = 128
+_result_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+def _payload_key(*parts: Any) -> str:
+    """Build a stable digest of everything that influences the generated insights."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# Rule-based recommendation rules as (recommendations, priority actions),
+# in output order: high crowd, bottleneck, hotspots, increasing trend, high variability
+_RULES = (
+    (("Increase staffing immediately to handle high crowd density",
+      "Monitor crowd levels closely for safety compliance"),
+     ("Deploy {suggested_nurses} nurse(s) to waiting area",)),
+    (("Address bottleneck periods with additional staff during peak times",),
+     ("Focus resources during peak time: {peak_time}",)),
+    (("Position staff strategically in high-density {hotspots} zones",),
+     ("Station personnel in {hotspots} areas",)),
+    (("Prepare for continued growth - consider long-term capacity planning",),
+     ("Review scheduling to accommodate increasing demand",)),
+    (("High variability detected - implement flexible staffing model",),
+     ()),
+)
+
+# Every combination of triggered rules mapped to its (recommendation, action) templates
+_RULE_TABLE = {
+    flags: (
+        tuple(rec for on, (recs, _) in zip(flags, _RULES) if on for rec in recs),
+        tuple(action for on, (_, actions) in zip(flags, _RULES) if on for action in actions),
+    )
+    for flags in itertools.product((False, True), repeat=len(_RULES))
+}
+
+
+def _is_missing(value: Any) -> bool:
+    """True for context values that were not provided (zero is a real value)."""
+    return value is None or value == "" or value == "N/A"
+
+
+def _prompt_lines(items: List[tuple]) -> str:
+    """Render (label, value) pairs as prompt bullet lines, skipping missing values."""
+    return "".join(f"- {label}: {value}\n" for label, value in items if not _is_missing(value))
+
+
+def _prompt_section(title: str, items: List[tuple]) -> str:
+    """Render a titled prompt block, or nothing when every value is missing."""
+    lines = _prompt_lines(items)
+    return f"\n{title}:\n{lines}" if lines else ""
+
+
+def _out_of(available: Any, total: Any) -> Optional[str]:
+    """Format 'available out of total', dropping whichever part is missing."""
+    if _is_missing(available):
+        return None
+    return str(available) if _is_missing(total) else f"{available} out of {total}"
+
+
+def _as_int(value: Any, default: int) -> int:
+    """Coerce counts that may arrive as numpy scalars to plain int."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _hotspot_names(spatial: Dict) -> List[str]:
+    """Normalize spatial hotspots (zone dicts or plain labels) to zone names."""
+    return [
+        h.get('zone', 'Unknown') if isinstance(h, dict) else str(h)
+        for h in spatial.get('hotspots') or []
+    ]
+
+
+class _CircuitBreaker:
+    """
+    Minimal thread-safe circuit breaker for Gemini calls.
+    
+    Opens after ``fail_max`` consecutive failures and rejects calls until
+    ``reset_timeout`` seconds have passed; then a single trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self, fail_max: int = 3, reset_timeout: float = 60.0):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half-open."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+    
+    def allow_request(self) -> bool:
+        """Return True if a call may be attempted now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+    
+    def release(self):
+        """Give back a half-open trial slot that ended without reaching Gemini."""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Count a failure, opening the circuit once the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"Gemini failed {self._failures} times in a row, "
+                        f"using rule-based insights for {self.reset_timeout:.0f}s"
+                    )
+                self._opened_at = time.monotonic()
+
+
+# Shared by all assistants since a new one is created for each analysis
+_gemini_breaker = _CircuitBreaker(fail_max=3, reset_timeout=60.0)
+
+
+class _RateLimiter:
+    """
+    Token buckets for Gemini's requests-per-minute and tokens-per-minute quotas.
+    
+    Callers reserve capacity up front and sleep until it is available, so
+    concurrent analyses queue for quota instead of colliding into 429s. A
+    limit of 0 disables that bucket.
+    """
+    
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_wait: float):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: int) -> bool:
+        """Reserve one request and ``tokens`` tokens; False if the wait would exceed max_wait."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed_minutes = (now - self._updated) / 60.0
+            self._updated = now
+            
+            wait = 0.0
+            if self.requests_per_minute > 0:
+                self._requests = min(
+                    self.requests_per_minute,
+                    self._requests + elapsed_minutes * self.requests_per_minute
+                )
+                wait = max(wait, (1 - self._requests) * 60.0 / self.requests_per_minute)
+            if self.tokens_per_minute > 0:
+                tokens = min(tokens, self.tokens_per_minute)
+                self._tokens = min(
+                    self.tokens_per_minute,
+                    self._tokens + elapsed_minutes * self.tokens_per_minute
+                )
+                wait = max(wait, (tokens - self._tokens) * 60.0 / self.tokens_per_minute)
+            
+            if wait > self.max_wait:
+                return False
+            
+            # Buckets may go negative: the deficit is what later callers wait on
+            if self.requests_per_minute > 0:
+                self._requests -= 1
+            if self.tokens_per_minute > 0:
+                self._tokens -= tokens
+        
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+# Disabled unless configured; when set, calls over quota queue for up to
+# max_wait seconds and then fall back to rule-based insights
+_gemini_limiter = _RateLimiter(
+    requests_per_minute=int(os.getenv("GEMINI_RATE_LIMIT_RPM", "0")),
+    tokens_per_minute=int(os.getenv("GEMINI_RATE_LIMIT_TPM", "0")),
+    max_wait=float(os.getenv("GEMINI_RATE_LIMIT_MAX_WAIT", "10"))
+)
+
+
+# Models are shared across assistant instances so they reuse the client
+# transport created by genai.configure instead of reconnecting per instance
+_shared_models: Dict[tuple, Any] = {}
+_shared_models_lock = threading.Lock()
+_configured_api_key: Optional[str] = None
+
+
+def _get_shared_model(api_key: str, model_name: str, temperature: float, max_output_tokens: int):
+    """Return a cached GenerativeModel for the given configuration, creating it on first use."""
+    global _configured_api_key
+    key = (api_key, model_name, temperature, max_output_tokens)
+    with _shared_models_lock:
+        model = _shared_models.get(key)
+        if model is None:
+            if _configured_api_key != api_key:
+                genai.configure(api_key=api_key)
+                _configured_api_key = api_key
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config={
+                    "temperature": temperature,
+                    "max_output_tokens": max_output_tokens,
+                }
+            )
+            _shared_models[key] = model
+    return model
+
+# Section header keywords in priority order; when a line holds several, the earliest entry wins
+_SECTION_KEYWORDS = (
+    ("executive summary", "summary"),
+    ("key finding", "key_findings"),
+    ("staff recommendation", "staff_suggestions"),
+    ("staffing", "staff_suggestions"),
+    ("bottleneck area", "bottleneck_areas"),
+    ("priority action", "priority_actions"),
+    ("immediate step", "priority_actions"),
+    ("recommendation", "recommendations"),
+    ("long-term", "recommendations"),
+)
+_SECTION_RANK = {keyword: (rank, section) for rank, (keyword, section) in enumerate(_SECTION_KEYWORDS)}
+_SECTION_RE = re.compile("|".join(re.escape(k) for k, _ in _SECTION_KEYWORDS), re.IGNORECASE)
+_SUMMARY_RE = re.compile("summary", re.IGNORECASE)
+_BULLET_CHARS = '-•*0123456789. '
+_BULLET_PREFIXES = ('-', '•', '*', '1', '2', '3', '4', '5')
+_ACTION_PREFIXES = ('1', '2', '3', '4', '5', '-', '•')
+_MAX_HEADER_LENGTH = 80
+
+
+# Prompt templates are compiled once at import; only slot values are computed per call
+_PROMPT_BODY = """You are an expert healthcare operations analyst specializing in emergency room and hospital waiting area flow optimization. 
+Analyze the following video analysis results combined with real-time hospital resource data and provide actionable insights.
+
+HOSPITAL LOCATION & CONTEXT:
+- Location: ${location}
+- Area being monitored: ${area_sqm} square meters
+${analysis_date}
+VIDEO INFORMATION:
+- Duration: ${duration}
+- Resolution: ${width}x${height}
+- Total frames analyzed: ${frames_analyzed}
+${staffing_section}${resources_section}
+CROWD DETECTION STATISTICS:
+- Average people count: ${avg_count}
+- Peak people count: ${max_count}
+- Minimum people count: ${min_count}
+- Total detections: ${total_detections}
+
+CROWD DENSITY ANALYSIS:
+- Density level: ${density_level}
+- Density per sqm: ${density_per_sqm}
+- Severity score: ${severity_score}/5
+
+BOTTLENECK ANALYSIS:
+- Bottlenecks detected: ${bottlenecks_detected}
+- Threshold used: ${threshold_used} people
+- Total bottleneck duration: ${bottleneck_duration} seconds
+${bottleneck_periods}
+SPATIAL DISTRIBUTION:
+- Pattern: ${distribution_pattern}
+- Hotspot zones: ${hotspots}
+
+CROWD FLOW METRICS:
+- Trend: ${trend} (flow rate: ${flow_rate} people/sec)
+- Variability: ${variability}
+- Coefficient of variation: ${cov}
+
+CURRENT ASSESSMENT:
+- Crowd level: ${crowd_level}
+- Peak congestion time: ${peak_time}
+- Bottleneck detected: ${bottleneck_detected}
+"""
+
+_PROMPT_WITH_RECOMMENDATIONS = Template(_PROMPT_BODY + """
+RESOURCE CONSTRAINTS & CONSIDERATIONS:
+${constraint_lines}- Estimated waiting patients: ${avg_count}
+
+Please provide recommendations CONSIDERING CURRENT HOSPITAL CAPACITY:
+1. **Executive Summary** (2-3 sentences): Overall assessment of the situation RELATIVE TO current staffing and bed availability
+2. **Key Findings** (3-5 bullet points): Most important observations
+3. **Bottleneck Areas**: Specific locations or times requiring attention
+4. **Staff Recommendations**: 
+${staff_availability}   - Provide specific recommendations based on detected crowd vs available staff
+   - Include realistic assessments given hospital constraints
+5. **Bed Capacity Assessment**:
+   - Current situation: ${bed_situation}${avg_count} waiting patients
+   - Provide capacity recommendations
+6. **Priority Actions** (numbered list): Immediate steps to improve flow WITH CURRENT RESOURCES
+7. **Resource Requests** (if needed): What additional staff or beds would optimize operations
+
+Format your response clearly with these sections. Be specific, actionable, and data-driven.
+Focus on practical recommendations that hospital administrators can implement immediately.
+Consider the reality of current staffing and bed availability - don't recommend unrealistic resource levels.
+""")
+
+_PROMPT_WITHOUT_RECOMMENDATIONS = Template(_PROMPT_BODY + """
+Please provide:
+1. **Executive Summary**: Overall assessment
+2. **Key Findings**: Most important observations
+3. **Insights**: What the data reveals about crowd patterns
+
+Be concise, specific, and data-driven.
+""")
+
 
 class GeminiAssistant:
     """
@@ -58,14 +398,7 @@ class GeminiAssistant:
         # Initialize Gemini if available
         if GENAI_AVAILABLE and api_key:
             try:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel(
-                    model_name=model_name,
-                    generation_config={
-                        "temperature": temperature,
-                        "max_output_tokens": max_output_tokens,
-                    }
-                )
+                self.model = _get_shared_model(api_key, model_name, temperature, max_output_tokens)
                 logger.info(f"Gemini AI Assistant initialized with model: {model_name}")
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini: {e}")
@@ -80,7 +413,8 @@ class GeminiAssistant:
     def generate_insights(
         self,
         analysis_results: Dict,
-        include_recommendations: bool = True
+        include_recommendations: bool = True,
+        debug: bool = False
     ) -> Dict[str, Any]:
         """
         Generate AI-powered insights from analysis results.
@@ -88,10 +422,17 @@ class GeminiAssistant:
         Args:
             analysis_results: Complete video analysis results
             include_recommendations: Include staff recommendations
+            debug: Include the unparsed Gemini response as raw_ai_response
             
         Returns:
-            Dictionary with AI insights, summary, and recommendations
+            Dictionary with AI insights, summary, and recommendations.
+            All values are JSON-native (str, int, list, dict), so the result
+            can go straight to a fast encoder such as orjson.dumps without
+            a numpy-aware fallback.
         """
+        # Stamp once so every code path (including fallbacks) reports the same time
+        generated_at = datetime.now().isoformat()
+        
         try:
             # Extract key metrics
             stats = analysis_results.get("statistics", {})
@@ -99,21 +440,43 @@ class GeminiAssistant:
             enhanced = analysis_results.get("enhanced_analytics", {})
             video_meta = analysis_results.get("video_metadata", {})
             
+            cache_key = _payload_key(
+                stats, insights, enhanced, video_meta, include_recommendations,
+                self.hospital_context, self.get_model_info()["mode"], self.model_name, debug
+            )
+            with _result_cache_lock:
+                cached = _result_cache.get(cache_key)
+                if cached is not None:
+                    _result_cache.move_to_end(cache_key)
+            if cached is not None:
+                # The cache holds results without generated_at; stamp each hit
+                return {**copy.deepcopy(cached), "generated_at": generated_at}
+            
             # If Gemini is available, use it
             if self.model:
-                return self._generate_ai_insights(
-                    stats, insights, enhanced, video_meta, include_recommendations
+                result = self._generate_ai_insights(
+                    stats, insights, enhanced, video_meta, include_recommendations, generated_at, debug
                 )
             else:
                 # Fallback to rule-based insights
-                return self._generate_rule_based_insights(
-                    stats, insights, enhanced, video_meta, include_recommendations
+                result = self._generate_rule_based_insights(
+                    stats, insights, enhanced, video_meta, include_recommendations, generated_at
                 )
+            
+            # Don't pin a rule-based fallback caused by a transient Gemini failure
+            if not self.model or result.get("generated_by") == "gemini-ai":
+                stored = copy.deepcopy(result)
+                stored.pop("generated_at", None)
+                with _result_cache_lock:
+                    _result_cache[cache_key] = stored
+                    if len(_result_cache) > RESULT_CACHE_SIZE:
+                        _result_cache.popitem(last=False)
+            return result
         
         except Exception as e:
             logger.error(f"Error generating insights: {e}")
             # Always have a fallback
-            return self._generate_basic_insights(analysis_results)
+            return self._generate_basic_insights(analysis_results, generated_at)
     
     def _generate_ai_insights(
         self,
@@ -121,39 +484,64 @@ class GeminiAssistant:
         insights: Dict,
         enhanced: Dict,
         video_meta: Dict,
-        include_recommendations: bool
+        include_recommendations: bool,
+        generated_at: Optional[str] = None,
+        debug: bool = False
     ) -> Dict[str, Any]:
         """Generate insights using Gemini AI."""
+        # Skip the network round trip entirely while Gemini is known to be failing
+        if not _gemini_breaker.allow_request():
+            logger.debug("Gemini circuit open, using rule-based insights")
+            return self._generate_rule_based_insights(
+                stats, insights, enhanced, video_meta, include_recommendations, generated_at
+            )
+        
         try:
             # Build comprehensive prompt
             prompt = self._build_insights_prompt(
                 stats, insights, enhanced, video_meta, include_recommendations
             )
             
+            # Wait for quota locally rather than provoking a 429 from Gemini
+            if not _gemini_limiter.acquire(len(prompt) // 4 + self.max_output_tokens):
+                _gemini_breaker.release()
+                logger.warning("Gemini rate limit reached, using rule-based insights")
+                return self._generate_rule_based_insights(
+                    stats, insights, enhanced, video_meta, include_recommendations, generated_at
+                )
+            
             # Generate response
-            response = self.model.generate_content(prompt)
-            ai_text = response.text
+            try:
+                response = self.model.generate_content(prompt)
+                ai_text = response.text
+            except Exception:
+                _gemini_breaker.record_failure()
+                raise
+            _gemini_breaker.record_success()
             
             # Parse AI response into structured format
             parsed = self._parse_ai_response(ai_text, stats, insights, enhanced)
             
-            return {
+            result = {
                 "ai_summary": parsed.get("summary", ai_text[:500]),
                 "key_findings": parsed.get("key_findings", []),
                 "recommendations": parsed.get("recommendations", []),
                 "staff_suggestions": parsed.get("staff_suggestions", {}),
                 "bottleneck_areas": parsed.get("bottleneck_areas", []),
                 "priority_actions": parsed.get("priority_actions", []),
-                "raw_ai_response": ai_text,
                 "generated_by": "gemini-ai",
-                "generated_at": datetime.now().isoformat()
+                "generated_at": generated_at or datetime.now().isoformat()
             }
+            if debug:
+                result["raw_ai_response"] = ai_text
+            return result
         
         except Exception as e:
+            _gemini_breaker.release()
             logger.error(f"Error with AI generation: {e}")
             # Fallback to rule-based
             return self._generate_rule_based_insights(
-                stats, insights, enhanced, video_meta, include_recommendations
+                stats, insights, enhanced, video_meta, include_recommendations, generated_at
             )
     
     def _build_insights_prompt(
@@ -178,114 +566,86 @@ class GeminiAssistant:
         location = self.hospital_context.get("location_name", "Hospital Area")
         area_sqm = self.hospital_context.get("area_sqm", 100)
         
-        prompt = f"""You are an expert healthcare operations analyst specializing in emergency room and hospital waiting area flow optimization. 
-Analyze the following video analysis results combined with real-time hospital resource data and provide actionable insights.
-
-HOSPITAL LOCATION & CONTEXT:
-- Location: {location}
-- Area being monitored: {area_sqm} square meters
-- Analysis Date: {video_meta.get('created_at', 'N/A')}
-
-VIDEO INFORMATION:
-- Duration: {video_meta.get('duration_formatted', 'N/A')}
-- Resolution: {video_meta.get('width', 0)}x{video_meta.get('height', 0)}
-- Total frames analyzed: {stats.get('frames_analyzed', 0)}
-
-HOSPITAL STAFFING STATUS (Real-time):
-- Total Nurses on Duty: {staffing.get('total_nurses', 'N/A')}
-- Currently Available Nurses: {staffing.get('available_nurses', 'N/A')}
-- Total Doctors on Duty: {staffing.get('total_doctors', 'N/A')}
-- Currently Available Doctors: {staffing.get('available_doctors', 'N/A')}
-- Shift Type: {staffing.get('shift_type', 'N/A')}
-
-HOSPITAL RESOURCES STATUS (Real-time):
-- Total Beds: {resources.get('total_beds', 'N/A')}
-- Occupied Beds: {resources.get('occupied_beds', 'N/A')}
-- Available Beds: {resources.get('available_beds', 'N/A')}
-- Critical Care Beds: {resources.get('critical_care_beds', 'N/A')}
-- General Beds: {resources.get('general_beds', 'N/A')}
-
-CROWD DETECTION STATISTICS:
-- Average people count: {stats.get('average_person_count', 0):.1f}
-- Peak people count: {stats.get('max_person_count', 0)}
-- Minimum people count: {stats.get('min_person_count', 0)}
-- Total detections: {stats.get('total_detections', 0)}
-
-CROWD DENSITY ANALYSIS:
-- Density level: {density.get('density_level', 'N/A')}
-- Density per sqm: {density.get('density_per_sqm', 0):.3f}
-- Severity score: {density.get('severity_score', 0)}/5
-
-BOTTLENECK ANALYSIS:
-- Bottlenecks detected: {bottlenecks.get('bottlenecks_detected', 0)}
-- Threshold used: {bottlenecks.get('threshold_used', 0):.1f} people
-- Total bottleneck duration: {bottlenecks.get('total_bottleneck_duration_seconds', 0):.1f} seconds
-"""
-
+        hotspot_names = _hotspot_names(spatial)
+        
         # Add bottleneck periods if available
+        bottleneck_periods = ""
         if bottlenecks.get("bottleneck_periods"):
-            prompt += "\n- Critical periods:\n"
-            for i, period in enumerate(bottlenecks["bottleneck_periods"][:3], 1):
-                prompt += f"  {i}. {period.get('start_time', '')} to {period.get('end_time', '')}: "
-                prompt += f"{period.get('severity', '')} (score: {period.get('severity_score', 0):.1f})\n"
-                prompt += f"     Peak: {period.get('peak_count', 0)} people, Duration: {period.get('duration_seconds', 0):.1f}s\n"
-        
-        # Add spatial distribution
-        prompt += f"""
-SPATIAL DISTRIBUTION:
-- Pattern: {spatial.get('distribution_pattern', 'N/A')}
-- Hotspot zones: {', '.join([h.get('zone', 'Unknown') if isinstance(h, dict) else str(h) for h in spatial.get('hotspots', [])]) or 'None'}
-"""
+            bottleneck_periods = "\n- Critical periods:\n" + "".join(
+                f"  {i}. {period.get('start_time', '')} to {period.get('end_time', '')}: "
+                f"{period.get('severity', '')} (score: {period.get('severity_score', 0):.1f})\n"
+                f"     Peak: {period.get('peak_count', 0)} people, Duration: {period.get('duration_seconds', 0):.1f}s\n"
+                for i, period in enumerate(bottlenecks["bottleneck_periods"][:3], 1)
+            )
         
-        # Add flow metrics
-        prompt += f"""
-CROWD FLOW METRICS:
-- Trend: {flow.get('trend', 'N/A')} (flow rate: {flow.get('flow_rate', 0):.2f} people/sec)
-- Variability: {flow.get('variability', 'N/A')}
-- Coefficient of variation: {flow.get('coefficient_of_variation', 0):.2f}
-
-CURRENT ASSESSMENT:
-- Crowd level: {insights.get('crowd_level', 'N/A')}
-- Peak congestion time: {insights.get('peak_congestion_time', 'N/A')}
-- Bottleneck detected: {'Yes' if insights.get('bottleneck_detected', False) else 'No'}
-"""
-
-        if include_recommendations:
-            prompt += f"""
-RESOURCE CONSTRAINTS & CONSIDERATIONS:
-- Current available nurses: {staffing.get('available_nurses', 'N/A')} out of {staffing.get('total_nurses', 'N/A')}
-- Current available beds: {resources.get('available_beds', 'N/A')} out of {resources.get('total_beds', 'N/A')}
-- Estimated waiting patients: {stats.get('average_person_count', 0):.1f}
-
-Please provide recommendations CONSIDERING CURRENT HOSPITAL CAPACITY:
-1. **Executive Summary** (2-3 sentences): Overall assessment of the situation RELATIVE TO current staffing and bed availability
-2. **Key Findings** (3-5 bullet points): Most important observations
-3. **Bottleneck Areas**: Specific locations or times requiring attention
-4. **Staff Recommendations**: 
-   - IMPORTANT: Consider current staff availability: {staffing.get('available_nurses', 'N/A')} nurses currently available
-   - Provide specific recommendations based on detected crowd vs available staff
-   - Include realistic assessments given hospital constraints
-5. **Bed Capacity Assessment**:
-   - Current situation: {resources.get('available_beds', 'N/A')} beds available for {stats.get('average_person_count', 0):.1f} waiting patients
-   - Provide capacity recommendations
-6. **Priority Actions** (numbered list): Immediate steps to improve flow WITH CURRENT RESOURCES
-7. **Resource Requests** (if needed): What additional staff or beds would optimize operations
-
-Format your response clearly with these sections. Be specific, actionable, and data-driven.
-Focus on practical recommendations that hospital administrators can implement immediately.
-Consider the reality of current staffing and bed availability - don't recommend unrealistic resource levels.
-"""
-        else:
-            prompt += """
-Please provide:
-1. **Executive Summary**: Overall assessment
-2. **Key Findings**: Most important observations
-3. **Insights**: What the data reveals about crowd patterns
-
-Be concise, specific, and data-driven.
-"""
+        # Hospital context fields that were not provided are left out of the
+        # prompt instead of being padded with N/A; genuine zeros are kept
+        available_nurses = staffing.get('available_nurses')
+        total_nurses = staffing.get('total_nurses')
+        available_beds = resources.get('available_beds')
+        total_beds = resources.get('total_beds')
         
-        return prompt
+        staffing_section = _prompt_section("HOSPITAL STAFFING STATUS (Real-time)", [
+            ("Total Nurses on Duty", total_nurses),
+            ("Currently Available Nurses", available_nurses),
+            ("Total Doctors on Duty", staffing.get('total_doctors')),
+            ("Currently Available Doctors", staffing.get('available_doctors')),
+            ("Shift Type", staffing.get('shift_type')),
+        ])
+        resources_section = _prompt_section("HOSPITAL RESOURCES STATUS (Real-time)", [
+            ("Total Beds", total_beds),
+            ("Occupied Beds", resources.get('occupied_beds')),
+            ("Available Beds", available_beds),
+            ("Critical Care Beds", resources.get('critical_care_beds')),
+            ("General Beds", resources.get('general_beds')),
+        ])
+        constraint_lines = _prompt_lines([
+            ("Current available nurses", _out_of(available_nurses, total_nurses)),
+            ("Current available beds", _out_of(available_beds, total_beds)),
+        ])
+        staff_availability = "" if _is_missing(available_nurses) else (
+            f"   - IMPORTANT: Consider current staff availability: {available_nurses} nurses currently available\n"
+        )
+        bed_situation = "" if _is_missing(available_beds) else f"{available_beds} beds available for "
+        created_at = video_meta.get('created_at')
+        
+        values = {
+            "location": location,
+            "area_sqm": area_sqm,
+            "analysis_date": "" if _is_missing(created_at) else f"- Analysis Date: {created_at}\n",
+            "duration": video_meta.get('duration_formatted', 'N/A'),
+            "width": video_meta.get('width', 0),
+            "height": video_meta.get('height', 0),
+            "frames_analyzed": stats.get('frames_analyzed', 0),
+            "staffing_section": staffing_section,
+            "resources_section": resources_section,
+            "constraint_lines": constraint_lines,
+            "staff_availability": staff_availability,
+            "bed_situation": bed_situation,
+            "avg_count": f"{stats.get('average_person_count', 0):.1f}",
+            "max_count": stats.get('max_person_count', 0),
+            "min_count": stats.get('min_person_count', 0),
+            "total_detections": stats.get('total_detections', 0),
+            "density_level": density.get('density_level', 'N/A'),
+            "density_per_sqm": f"{density.get('density_per_sqm', 0):.3f}",
+            "severity_score": density.get('severity_score', 0),
+            "bottlenecks_detected": bottlenecks.get('bottlenecks_detected', 0),
+            "threshold_used": f"{bottlenecks.get('threshold_used', 0):.1f}",
+            "bottleneck_duration": f"{bottlenecks.get('total_bottleneck_duration_seconds', 0):.1f}",
+            "bottleneck_periods": bottleneck_periods,
+            "distribution_pattern": spatial.get('distribution_pattern', 'N/A'),
+            "hotspots": ', '.join(hotspot_names) or 'None',
+            "trend": flow.get('trend', 'N/A'),
+            "flow_rate": f"{flow.get('flow_rate', 0):.2f}",
+            "variability": flow.get('variability', 'N/A'),
+            "cov": f"{flow.get('coefficient_of_variation', 0):.2f}",
+            "crowd_level": insights.get('crowd_level', 'N/A'),
+            "peak_time": insights.get('peak_congestion_time', 'N/A'),
+            "bottleneck_detected": 'Yes' if insights.get('bottleneck_detected', False) else 'No',
+        }
+        
+        template = _PROMPT_WITH_RECOMMENDATIONS if include_recommendations else _PROMPT_WITHOUT_RECOMMENDATIONS
+        return template.substitute(values)
     
     def _parse_ai_response(
         self,
@@ -315,42 +675,31 @@ Be concise, specific, and data-driven.
                 if not line:
                     continue
                 
-                # Detect sections
-                lower_line = line.lower()
-                if "executive summary" in lower_line or "summary" in lower_line[:20]:
-                    current_section = "summary"
-                    continue
-                elif "key finding" in lower_line:
-                    current_section = "key_findings"
-                    continue
-                elif "staff recommendation" in lower_line or "staffing" in lower_line:
-                    current_section = "staff_suggestions"
-                    continue
-                elif "bottleneck area" in lower_line:
-                    current_section = "bottleneck_areas"
-                    continue
-                elif "priority action" in lower_line or "immediate step" in lower_line:
-                    current_section = "priority_actions"
-                    continue
-                elif "recommendation" in lower_line or "long-term" in lower_line:
-                    current_section = "recommendations"
-                    continue
+                # Detect sections (long lines are content, not headers)
+                if len(line) <= _MAX_HEADER_LENGTH:
+                    if _SUMMARY_RE.search(line, 0, 20):
+                        current_section = "summary"
+                        continue
+                    headers = _SECTION_RE.findall(line)
+                    if headers:
+                        current_section = min(_SECTION_RANK[h.lower()] for h in headers)[1]
+                        continue
                 
                 # Add content to current section
                 if current_section == "summary" and len(sections["summary"]) < 500:
                     sections["summary"] += line + " "
-                elif current_section == "key_findings" and line.startswith(('-', '•', '*', '1', '2', '3', '4', '5')):
-                    sections["key_findings"].append(line.lstrip('-•*0123456789. '))
-                elif current_section == "recommendations" and line.startswith(('-', '•', '*', '1', '2', '3', '4', '5')):
-                    sections["recommendations"].append(line.lstrip('-•*0123456789. '))
+                elif current_section == "key_findings" and line.startswith(_BULLET_PREFIXES):
+                    sections["key_findings"].append(line.lstrip(_BULLET_CHARS))
+                elif current_section == "recommendations" and line.startswith(_BULLET_PREFIXES):
+                    sections["recommendations"].append(line.lstrip(_BULLET_CHARS))
                 elif current_section == "bottleneck_areas":
-                    sections["bottleneck_areas"].append(line.lstrip('-•*0123456789. '))
-                elif current_section == "priority_actions" and line.startswith(('1', '2', '3', '4', '5', '-', '•')):
-                    sections["priority_actions"].append(line.lstrip('-•*0123456789. '))
+                    sections["bottleneck_areas"].append(line.lstrip(_BULLET_CHARS))
+                elif current_section == "priority_actions" and line.startswith(_ACTION_PREFIXES):
+                    sections["priority_actions"].append(line.lstrip(_BULLET_CHARS))
             
             # Extract staff suggestions
             sections["staff_suggestions"] = {
-                "suggested_nurses": insights.get("suggested_nurses", 0),
+                "suggested_nurses": _as_int(insights.get("suggested_nurses"), 0),
                 "reasoning": ai_text if "nurse" in ai_text.lower() or "staff" in ai_text.lower() else "Based on crowd density analysis"
             }
             
@@ -368,11 +717,13 @@ Be concise, specific, and data-driven.
         insights: Dict,
         enhanced: Dict,
         video_meta: Dict,
-        include_recommendations: bool
+        include_recommendations: bool,
+        generated_at: Optional[str] = None
     ) -> Dict[str, Any]:
         """Generate insights using rule-based logic (fallback)."""
         
         avg_count = stats.get("average_person_count", 0)
+        avg_str = format(avg_count, ".1f")
         max_count = stats.get("max_person_count", 0)
         crowd_level = insights.get("crowd_level", "Unknown")
         bottleneck = insights.get("bottleneck_detected", False)
@@ -382,32 +733,32 @@ Be concise, specific, and data-driven.
         bottlenecks = enhanced.get("bottleneck_analysis", {})
         spatial = enhanced.get("spatial_distribution", {})
         flow = enhanced.get("flow_metrics", {})
+        hotspot_names = _hotspot_names(spatial)
+        hotspots_str = ', '.join(hotspot_names)
         
         # Build summary
         summary = f"Analysis of {video_meta.get('duration_formatted', 'N/A')} video reveals {crowd_level.lower()} crowd levels "
-        summary += f"with an average of {avg_count:.1f} people. "
+        summary += f"with an average of {avg_str} people. "
         
         if bottleneck:
             summary += f"Critical bottleneck detected with peak congestion of {max_count} people. "
         
-        if spatial.get("hotspots"):
-            hotspot_names = [h.get('zone', 'Unknown') if isinstance(h, dict) else str(h) for h in spatial['hotspots']]
-            summary += f"High-density areas identified in {', '.join(hotspot_names)} zones. "
+        if hotspot_names:
+            summary += f"High-density areas identified in {hotspots_str} zones. "
         
         if flow.get("trend") == "Increasing":
             summary += "Crowd levels are trending upward, indicating growing demand. "
         
         # Key findings
         key_findings = []
-        key_findings.append(f"Average occupancy: {avg_count:.1f} people ({density.get('density_level', 'N/A')} density)")
+        key_findings.append(f"Average occupancy: {avg_str} people ({density.get('density_level', 'N/A')} density)")
         key_findings.append(f"Peak congestion: {max_count} people at {insights.get('peak_congestion_time', 'N/A')}")
         
         if bottlenecks.get("bottlenecks_detected", 0) > 0:
             key_findings.append(f"Detected {bottlenecks['bottlenecks_detected']} bottleneck period(s) requiring attention")
         
-        if spatial.get("hotspots"):
-            hotspot_names = [h.get('zone', 'Unknown') if isinstance(h, dict) else str(h) for h in spatial['hotspots']]
-            key_findings.append(f"Crowd concentration in: {', '.join(hotspot_names)}")
+        if hotspot_names:
+            key_findings.append(f"Crowd concentration in: {hotspots_str}")
         
         key_findings.append(f"Crowd flow trend: {flow.get('trend', 'Stable')} with {flow.get('variability', 'moderate')} variability")
         
@@ -416,34 +767,24 @@ Be concise, specific, and data-driven.
         priority_actions = []
         
         if include_recommendations:
-            suggested_nurses = insights.get("suggested_nurses", 1)
-            
-            if crowd_level in ["High", "Very High"]:
-                recommendations.append("Increase staffing immediately to handle high crowd density")
-                priority_actions.append(f"Deploy {suggested_nurses} nurse(s) to waiting area")
-                recommendations.append("Monitor crowd levels closely for safety compliance")
-            
-            if bottleneck:
-                recommendations.append("Address bottleneck periods with additional staff during peak times")
-                priority_actions.append(f"Focus resources during peak time: {insights.get('peak_congestion_time', 'N/A')}")
-            
-            if spatial.get("hotspots"):
-                hotspot_names = [h.get('zone', 'Unknown') if isinstance(h, dict) else str(h) for h in spatial['hotspots']]
-                hotspots_str = ', '.join(hotspot_names)
-                recommendations.append(f"Position staff strategically in high-density {hotspots_str} zones")
-                priority_actions.append(f"Station personnel in {hotspots_str} areas")
-            
-            if flow.get("trend") == "Increasing":
-                recommendations.append("Prepare for continued growth - consider long-term capacity planning")
-                priority_actions.append("Review scheduling to accommodate increasing demand")
-            
-            if flow.get("variability") == "High":
-                recommendations.append("High variability detected - implement flexible staffing model")
+            rule_key = (
+                crowd_level in ("High", "Very High"),
+                bool(bottleneck),
+                bool(hotspot_names),
+                flow.get("trend") == "Increasing",
+                flow.get("variability") == "High",
+            )
+            rec_templates, action_templates = _RULE_TABLE[rule_key]
+            fields = {
+                "suggested_nurses": _as_int(insights.get("suggested_nurses"), 1),
+                "peak_time": insights.get("peak_congestion_time", "N/A"),
+                "hotspots": hotspots_str,
+            }
+            recommendations = [t.format_map(fields) for t in rec_templates]
+            priority_actions = [t.format_map(fields) for t in action_templates]
         
         # Bottleneck areas
-        bottleneck_areas = []
-        if spatial.get("hotspots"):
-            bottleneck_areas = [h.get('zone', 'Unknown') if isinstance(h, dict) else str(h) for h in spatial["hotspots"]]
+        bottleneck_areas = list(hotspot_names)
         if bottlenecks.get("bottleneck_periods"):
             for period in bottlenecks["bottleneck_periods"][:2]:
                 bottleneck_areas.append(f"Time {period.get('start_time', '')} - {period.get('end_time', '')} ({period.get('severity', '')})")
@@ -453,17 +794,21 @@ Be concise, specific, and data-driven.
             "key_findings": key_findings,
             "recommendations": recommendations if include_recommendations else [],
             "staff_suggestions": {
-                "suggested_nurses": insights.get("suggested_nurses", 1),
-                "reasoning": f"Based on average crowd of {avg_count:.1f} people and {crowd_level.lower()} density level. "
+                "suggested_nurses": _as_int(insights.get("suggested_nurses"), 1),
+                "reasoning": f"Based on average crowd of {avg_str} people and {crowd_level.lower()} density level. "
                             f"Standard ratio: 1 nurse per 8-10 people in waiting area."
             } if include_recommendations else {},
             "bottleneck_areas": bottleneck_areas,
             "priority_actions": priority_actions if include_recommendations else [],
             "generated_by": "rule-based",
-            "generated_at": datetime.now().isoformat()
+            "generated_at": generated_at or datetime.now().isoformat()
         }
     
-    def _generate_basic_insights(self, analysis_results: Dict) -> Dict[str, Any]:
+    def _generate_basic_insights(
+        self,
+        analysis_results: Dict,
+        generated_at: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Generate minimal insights when everything else fails."""
         stats = analysis_results.get("statistics", {})
         insights = analysis_results.get("insights", {})
@@ -477,13 +822,13 @@ Be concise, specific, and data-driven.
             ],
             "recommendations": [],
             "staff_suggestions": {
-                "suggested_nurses": insights.get("suggested_nurses", 1),
+                "suggested_nurses": _as_int(insights.get("suggested_nurses"), 1),
                 "reasoning": "Based on standard staffing ratios"
             },
             "bottleneck_areas": [],
             "priority_actions": [],
             "generated_by": "basic-fallback",
-            "generated_at": datetime.now().isoformat()
+            "generated_at": generated_at or datetime.now().isoformat()
         }
     
     def get_model_info(self) -> Dict:
@@ -494,10 +839,17 @@ Be concise, specific, and data-driven.
             "max_output_tokens": self.max_output_tokens,
             "gemini_available": GENAI_AVAILABLE,
             "model_initialized": self.model is not None,
-            "mode": "gemini-ai" if self.model else "rule-based"
+            "mode": "gemini-ai" if self.model else "rule-based",
+            "circuit_state": _gemini_breaker.state
         }
 
 
+@functools.lru_cache(maxsize=8)
+def _get_quick_assistant(api_key: Optional[str]) -> GeminiAssistant:
+    """Reuse one assistant per API key for generate_quick_insights."""
+    return GeminiAssistant(api_key=api_key)
+
+
 # Convenience function for quick insights generation
 def generate_quick_insights(analysis_results: Dict, api_key: Optional[str] = None) -> Dict:
     """
@@ -510,5 +862,5 @@ def generate_quick_insights(analysis_results: Dict, api_key: Optional[str] = Non
     Returns:
         AI insights and recommendations
     """
-    assistant = GeminiAssistant(api_key=api_key)
+    assistant = _get_quick_assistant(api_key)
     return assistant.generate_insights(analysis_results, include_recommendations=True)
@@ -10,14 +10,225 @@ Popular Algorithms Used:
 4. Lee-Longton Algorithm - for workload estimation
 """
 
+import copy
+import functools
+import json
 import logging
+import time
 import numpy as np
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+# Erlang results are memoized: the staffing sweep and repeated requests for the
+# same zone evaluate the same (arrival rate, service rate, agents) triples
+@functools.lru_cache(maxsize=4096)
+def _erlang_c(arrival_rate: float, service_rate: float, num_agents: int) -> float:
+    """Memoized Erlang C; see HospitalAnalytics.erlang_c_formula."""
+    if num_agents <= 0 or service_rate <= 0:
+        return 1.0
+    
+    intensity = arrival_rate / service_rate  # Traffic intensity
+    
+    if intensity >= num_agents:
+        # System is overloaded
+        return 1.0
+    
+    # Erlang B by recurrence: B(0) = 1, B(k) = a*B(k-1) / (k + a*B(k-1))
+    erlang_b = 1.0
+    for k in range(1, num_agents + 1):
+        erlang_b = intensity * erlang_b / (k + intensity * erlang_b)
+    
+    # Erlang C from Erlang B: C = c*B / (c - a*(1 - B))
+    erlang_c = num_agents * erlang_b / (num_agents - intensity * (1 - erlang_b))
+    
+    return min(max(erlang_c, 0.0), 1.0)
+
+
+@functools.lru_cache(maxsize=4096)
+def _average_wait_time(arrival_rate: float, service_rate: float, num_agents: int) -> float:
+    """Memoized M/M/c wait in minutes; see HospitalAnalytics.calculate_average_wait_time."""
+    if num_agents <= 0 or service_rate <= 0 or arrival_rate >= num_agents * service_rate:
+        return float('inf')
+    
+    erlang_c = _erlang_c(arrival_rate, service_rate, num_agents)
+    intensity = arrival_rate / service_rate
+    
+    wait_time_hours = (erlang_c / (num_agents * service_rate - arrival_rate))
+    wait_time_minutes = wait_time_hours * 60
+    
+    return max(0, wait_time_minutes)
+
+
+def _erlang_b_table_numpy(intensity: np.ndarray, max_agents: int) -> np.ndarray:
+    """Erlang B for levels 1..max_agents per zone, as an (N, max_agents) array."""
+    table = np.empty((intensity.shape[0], max_agents))
+    b = np.ones_like(intensity)
+    for k in range(1, max_agents + 1):
+        b = intensity * b / (k + intensity * b)
+        table[:, k - 1] = b
+    return table
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, parallel=True)
+    def _erlang_b_table(intensity, max_agents):
+        """JIT-compiled _erlang_b_table_numpy, parallel over zones."""
+        table = np.empty((intensity.shape[0], max_agents))
+        for i in numba.prange(intensity.shape[0]):
+            a = intensity[i]
+            b = 1.0
+            for k in range(1, max_agents + 1):
+                b = a * b / (k + a * b)
+                table[i, k - 1] = b
+        return table
+else:
+    _erlang_b_table = _erlang_b_table_numpy
+
+
+def _erlang_sweep(arrival_rate, service_rate, max_agents: int):
+    """
+    Erlang C and M/M/c wait (minutes) for every staffing level 1..max_agents.
+    
+    Runs the Erlang B recurrence once and derives all levels with array ops;
+    unstable levels get probability 1.0 and an infinite wait, as in _erlang_c.
+    Rates may be scalars or 1-D arrays of zones; results gain a trailing
+    staffing-level axis.
+    """
+    arrival_rate = np.asarray(arrival_rate, dtype=float)
+    service_rate = np.asarray(service_rate, dtype=float)
+    agents = np.arange(1, max_agents + 1, dtype=float)
+    intensity = arrival_rate / service_rate
+    
+    erlang_b = _erlang_b_table(intensity.reshape(-1), max_agents)
+    erlang_b = erlang_b.reshape(intensity.shape + (max_agents,))
+    
+    arrival_rate = arrival_rate[..., None]
+    service_rate = service_rate[..., None]
+    intensity = intensity[..., None]
+    stable = agents > intensity
+    with np.errstate(divide='ignore', invalid='ignore'):
+        erlang_c = agents * erlang_b / (agents - intensity * (1 - erlang_b))
+        wait_minutes = erlang_c / (agents * service_rate - arrival_rate) * 60
+    
+    erlang_c = np.where(stable, np.clip(erlang_c, 0.0, 1.0), 1.0)
+    wait_minutes = np.where(stable, np.maximum(wait_minutes, 0), np.inf)
+    return erlang_c, wait_minutes
+
+
+# Powers of ten for rounding whole result rows in one call, one per field:
+# arrival, service, intensity, wait, P(wait), utilization, confidence
+_STAFFING_SCALES = 10.0 ** np.array([1, 1, 2, 1, 3, 3, 2])
+# waiting, current occupancy, projected occupancy, beds needed, shortage,
+# critical care, general (BED_FORECAST_COLUMNS order, beds needed inserted)
+_BED_SCALES = 10.0 ** np.array([1, 3, 3, 0, 0, 1, 1])
+
+
+def _round_to(values, scales: np.ndarray) -> List[float]:
+    """Round each value to its own precision (scales are 10**decimals), as np.round does."""
+    return (np.rint(np.asarray(values, dtype=float) * scales) / scales).tolist()
+
+
+# Capacity score: staffing and beds each contribute up to half of the total
+_COMPONENT_MAX = 50.0
+_SCORE_MAX = 100.0
+
+
+def _capacity_scores(available_nurses, recommended_nurses, available_beds, beds_needed):
+    """Capacity score (0-100) for scalars or arrays of zones."""
+    staffing_component = np.minimum(
+        _COMPONENT_MAX,
+        np.divide(available_nurses, np.maximum(1, recommended_nurses)) * _COMPONENT_MAX
+    )
+    # No beds needed counts as full bed capacity
+    bed_component = np.where(
+        np.greater(beds_needed, 0),
+        np.minimum(_COMPONENT_MAX, np.divide(available_beds, np.maximum(1, beds_needed)) * _COMPONENT_MAX),
+        _COMPONENT_MAX
+    )
+    return np.clip(staffing_component + bed_component, 0.0, _SCORE_MAX)
+
+
+# Last (epoch millisecond, ISO string) pair; calls within the same millisecond
+# share one formatted timestamp
+_last_timestamp = (None, "")
+
+
+def _timestamp_iso() -> str:
+    """Local ISO-8601 timestamp with millisecond precision."""
+    global _last_timestamp
+    now_ms = time.time_ns() // 1_000_000
+    cached_ms, cached_iso = _last_timestamp
+    if now_ms != cached_ms:
+        cached_iso = datetime.fromtimestamp(now_ms / 1000).isoformat(timespec='milliseconds')
+        _last_timestamp = (now_ms, cached_iso)
+    return cached_iso
+
+
+class Urgency(IntEnum):
+    """Bed urgency levels, ordered so callers can compare severities."""
+    VERY_LOW = 0
+    LOW = 1
+    MODERATE = 2
+    HIGH = 3
+    CRITICAL = 4
+
+
+# Display strings returned in bed_analysis["urgency_level"], indexed by Urgency
+_URGENCY_LABELS = (
+    "Very Low - Adequate capacity",
+    "Low - Normal operations",
+    "Moderate - Monitor closely",
+    "High - Plan additional capacity",
+    "Critical - Immediate action required",
+)
+
+
+# Column layouts for HospitalAnalytics.calculate_bed_demand_forecasting_batch
+BED_INPUT_COLUMNS = (
+    "average_person_count",
+    "peak_person_count",
+    "total_beds",
+    "occupied_beds",
+    "available_beds",
+)
+BED_FORECAST_COLUMNS = (
+    "estimated_waiting_patients",
+    "current_occupancy_rate",
+    "projected_occupancy_rate",
+    "additional_capacity_needed",
+    "critical_care_beds_needed",
+    "general_beds_needed",
+    "urgency",
+)
+
+
+@dataclass
+class _StaffingCtx:
+    """Raw staffing results shared between the comprehensive-metrics helpers."""
+    arrival_rate: float
+    service_rate: float
+    intensity: float
+    available_nurses: int
+    recommended_nurses: int
+    additional_nurses: int
+    erlang_c: float
+    utilization: float
+    wait_time: float  # minutes, inf when no level meets the target
+    sweep_agents: np.ndarray  # candidate staffing levels
+    sweep_table: np.ndarray  # rounded (wait minutes, P(wait), utilization) per level
+
+
 class HospitalAnalytics:
     """
     Advanced analytics for hospital operations using crowd detection data
@@ -46,25 +257,7 @@ class HospitalAnalytics:
         Returns:
             Probability of waiting (0-1)
         """
-        if num_agents <= 0 or service_rate <= 0:
-            return 1.0
-        
-        intensity = arrival_rate / service_rate  # Traffic intensity
-        
-        if intensity >= num_agents:
-            # System is overloaded
-            return 1.0
-        
-        # Erlang C formula
-        erlang_b_numerator = (intensity ** num_agents) / np.math.factorial(num_agents)
-        erlang_b_sum = sum(
-            (intensity ** n) / np.math.factorial(n)
-            for n in range(num_agents + 1)
-        )
-        
-        erlang_c = erlang_b_numerator / (erlang_b_sum + erlang_b_numerator * (num_agents - intensity))
-        
-        return min(max(erlang_c, 0.0), 1.0)
+        return _erlang_c(arrival_rate, service_rate, num_agents)
     
     @staticmethod
     def calculate_average_wait_time(
@@ -83,16 +276,7 @@ class HospitalAnalytics:
         Returns:
             Average wait time in minutes
         """
-        if num_agents <= 0 or service_rate <= 0 or arrival_rate >= num_agents * service_rate:
-            return float('inf')
-        
-        erlang_c = HospitalAnalytics.erlang_c_formula(arrival_rate, service_rate, num_agents)
-        intensity = arrival_rate / service_rate
-        
-        wait_time_hours = (erlang_c / (num_agents * service_rate - arrival_rate))
-        wait_time_minutes = wait_time_hours * 60
-        
-        return max(0, wait_time_minutes)
+        return _average_wait_time(arrival_rate, service_rate, num_agents)
     
     @staticmethod
     def estimate_arrival_rate_from_crowd(
@@ -144,7 +328,7 @@ class HospitalAnalytics:
         base_service_rate_per_agent = 6.0
         
         # Adjust for area - larger areas may have slightly lower efficiency
-        area_factor = 1.0 if area_sqm < 200 else (200 / area_sqm)
+        area_factor = min(1.0, 200.0 / max(area_sqm, 1e-6))
         
         # Adjusted service rate
         service_rate = base_service_rate_per_agent * area_factor
@@ -176,47 +360,163 @@ class HospitalAnalytics:
         Returns:
             Staffing recommendation with detailed analysis
         """
-        # Estimate arrival and service rates
-        arrival_rate = self.estimate_arrival_rate_from_crowd(
+        return self._format_staffing(self._staffing_context(
+            average_person_count,
+            peak_person_count,
+            available_nurses,
+            video_duration_minutes,
+            target_wait_time_minutes,
+            area_sqm
+        ))
+    
+    def _staffing_context(
+        self,
+        average_person_count: float,
+        peak_person_count: int,
+        available_nurses: int,
+        video_duration_minutes: float,
+        target_wait_time_minutes: float,
+        area_sqm: float
+    ) -> _StaffingCtx:
+        """Run the staffing sweep and keep the raw numbers for downstream helpers."""
+        # Estimate arrival and service rates, quantized so Erlang cache hits land
+        arrival_rate = round(self.estimate_arrival_rate_from_crowd(
             average_person_count,
             peak_person_count,
             video_duration_minutes
-        )
+        ), 4)
         
-        service_rate = self.estimate_service_rate_from_context(
+        service_rate = round(self.estimate_service_rate_from_context(
             available_nurses,
             area_sqm
-        )
-        
-        # Find optimal number of agents
-        intensity = arrival_rate / service_rate if service_rate > 0 else 0
-        min_agents = int(np.ceil(intensity)) + 1  # Minimum to keep system stable
+        ), 4)
         
-        # Test different staffing levels
-        staffing_analysis = {}
-        optimal_staffing = available_nurses
-        best_wait_time = float('inf')
-        
-        for num_agents in range(max(1, min_agents - 1), min_agents + 5):
-            wait_time = self.calculate_average_wait_time(
-                arrival_rate, service_rate, num_agents
-            )
-            erlang_c = self.erlang_c_formula(arrival_rate, service_rate, num_agents)
+        return self._staffing_contexts(
+            [arrival_rate], [service_rate], [available_nurses], target_wait_time_minutes
+        )[0]
+    
+    @staticmethod
+    def _staffing_contexts(
+        arrival_rates,
+        service_rates,
+        available_nurses,
+        target_wait_time_minutes: float
+    ) -> List[_StaffingCtx]:
+        """Run one staffing sweep across many zones and build their contexts."""
+        arrival_rates = np.asarray(arrival_rates, dtype=float)
+        service_rates = np.asarray(service_rates, dtype=float)
+        available_nurses = np.asarray(available_nurses).tolist()
+        if arrival_rates.size == 0:
+            return []
+        
+        # Candidate window per zone: just below the stability minimum to 4 above it
+        intensity = arrival_rates / service_rates
+        min_agents = np.ceil(intensity).astype(int) + 1
+        lowest = np.maximum(1, min_agents - 1)
+        highest = min_agents + 4
+        
+        erlang_c, wait_times = _erlang_sweep(arrival_rates, service_rates, int(highest.max()))
+        agents = np.arange(1, erlang_c.shape[-1] + 1)
+        
+        # Optimal per zone: closest to target without exceeding it. M/M/c wait
+        # falls monotonically with staff, so that is the first level meeting it
+        within_target = (
+            (agents >= lowest[:, None])
+            & (agents <= highest[:, None])
+            & (wait_times <= target_wait_time_minutes)
+        )
+        best = np.argmax(within_target, axis=1)
+        has_best = within_target.any(axis=1)
+        
+        # Rounded (wait, P(wait), utilization) for every zone and level at once
+        utilization = intensity[:, None] / agents
+        table = np.stack([wait_times, erlang_c, utilization], axis=-1)
+        np.round(table[..., 0], 1, out=table[..., 0])
+        np.round(table[..., 1:], 3, out=table[..., 1:])
+        
+        contexts = []
+        for i, (lo, hi) in enumerate(zip(lowest.tolist(), highest.tolist())):
+            window = slice(lo - 1, hi)
             
-            staffing_analysis[num_agents] = {
-                "wait_time_minutes": round(wait_time, 1) if wait_time != float('inf') else "Unstable",
-                "probability_waiting": round(erlang_c, 3),
-                "system_utilization": round(intensity / num_agents, 3) if num_agents > 0 else 0
-            }
+            arrival_rate = float(arrival_rates[i])
+            service_rate = float(service_rates[i])
+            if has_best[i]:
+                optimal_staffing = int(agents[best[i]])
+                best_wait_time = float(wait_times[i, best[i]])
+                best_erlang_c = float(erlang_c[i, best[i]])
+                best_utilization = float(utilization[i, best[i]])
+            else:
+                # Nothing meets the target; fall back to the nurses on hand
+                optimal_staffing = available_nurses[i]
+                best_wait_time = float('inf')
+                best_erlang_c = _erlang_c(arrival_rate, service_rate, optimal_staffing)
+                best_utilization = float(intensity[i]) / optimal_staffing if optimal_staffing > 0 else 0.0
+            
+            contexts.append(_StaffingCtx(
+                arrival_rate=arrival_rate,
+                service_rate=service_rate,
+                intensity=float(intensity[i]),
+                available_nurses=available_nurses[i],
+                recommended_nurses=optimal_staffing,
+                additional_nurses=max(0, optimal_staffing - available_nurses[i]),
+                erlang_c=best_erlang_c,
+                utilization=best_utilization,
+                wait_time=best_wait_time,
+                sweep_agents=agents[window],
+                sweep_table=table[i, window]
+            ))
+        
+        return contexts
+    
+    def calculate_optimal_staffing_batch(
+        self,
+        average_person_counts,
+        peak_person_counts,
+        available_nurses,
+        video_durations_minutes,
+        areas_sqm,
+        target_wait_time_minutes: float = 10.0
+    ) -> List[Dict]:
+        """
+        Calculate optimal staffing for many zones with one broadcast Erlang C sweep.
+        
+        Args:
+            average_person_counts: Average detected people per zone
+            peak_person_counts: Peak detected people per zone
+            available_nurses: Currently available nurses per zone
+            video_durations_minutes: Video duration in minutes per zone
+            areas_sqm: Area being monitored per zone
+            target_wait_time_minutes: Target acceptable wait time
             
-            # Track optimal (closest to target without exceeding)
-            if wait_time <= target_wait_time_minutes and wait_time < best_wait_time:
-                optimal_staffing = num_agents
-                best_wait_time = wait_time
+        Returns:
+            One staffing recommendation per zone, as from calculate_optimal_staffing
+        """
+        average_person_counts = np.asarray(average_person_counts, dtype=float)
+        durations = np.asarray(video_durations_minutes, dtype=float)
+        areas = np.asarray(areas_sqm, dtype=float)
+        
+        # Same estimates as estimate_arrival_rate_from_crowd / estimate_service_rate_from_context
+        with np.errstate(divide='ignore', invalid='ignore'):
+            arrival_rates = np.where(
+                durations > 0,
+                np.maximum(0, (average_person_counts * 2) * (60 / durations)),
+                0.0
+            )
+        service_rates = np.maximum(1.0, 6.0 * np.minimum(1.0, 200.0 / np.maximum(areas, 1e-6)))
         
-        # Additional staff needed
-        current_available = available_nurses
-        additional_staff = max(0, optimal_staffing - current_available)
+        contexts = self._staffing_contexts(
+            np.round(arrival_rates, 4),
+            np.round(service_rates, 4),
+            available_nurses,
+            target_wait_time_minutes
+        )
+        return [self._format_staffing(ctx) for ctx in contexts]
+    
+    @staticmethod
+    def _format_staffing(ctx: _StaffingCtx) -> Dict:
+        """Build the public staffing recommendation from a sweep context."""
+        optimal_staffing = ctx.recommended_nurses
+        current_available = ctx.available_nurses
         
         # Confidence score (0-1)
         confidence = min(
@@ -224,18 +524,34 @@ class HospitalAnalytics:
             (optimal_staffing / max(current_available, 1)) * 0.8 + 0.2
         )
         
+        (arrival_rate, service_rate, intensity, wait_time,
+         erlang_c, utilization, confidence) = _round_to(
+            [ctx.arrival_rate, ctx.service_rate, ctx.intensity, ctx.wait_time,
+             ctx.erlang_c, ctx.utilization, confidence],
+            _STAFFING_SCALES
+        )
+        
         return {
             "recommended_nurses": optimal_staffing,
-            "additional_nurses_needed": additional_staff,
+            "additional_nurses_needed": ctx.additional_nurses,
             "current_available": current_available,
-            "arrival_rate_per_hour": round(arrival_rate, 1),
-            "service_rate_per_agent": round(service_rate, 1),
-            "system_intensity": round(intensity, 2),
-            "predicted_wait_time_minutes": round(best_wait_time, 1) if best_wait_time != float('inf') else "High",
-            "probability_waiting": round(self.erlang_c_formula(arrival_rate, service_rate, optimal_staffing), 3),
-            "system_utilization": round(intensity / optimal_staffing, 3) if optimal_staffing > 0 else 0,
-            "staffing_analysis": {str(k): v for k, v in staffing_analysis.items()},
-            "confidence": round(confidence, 2),
+            "arrival_rate_per_hour": arrival_rate,
+            "service_rate_per_agent": service_rate,
+            "system_intensity": intensity,
+            "predicted_wait_time_minutes": wait_time if wait_time != float('inf') else "High",
+            "probability_waiting": erlang_c,
+            "system_utilization": utilization,
+            "staffing_analysis": {
+                str(num_agents): {
+                    "wait_time_minutes": wait_time if wait_time != float('inf') else "Unstable",
+                    "probability_waiting": prob,
+                    "system_utilization": util
+                }
+                for num_agents, (wait_time, prob, util) in zip(
+                    ctx.sweep_agents.tolist(), ctx.sweep_table.tolist()
+                )
+            },
+            "confidence": confidence,
             "algorithm": "Erlang C + Queueing Theory (M/M/c)"
         }
     
@@ -263,87 +579,117 @@ class HospitalAnalytics:
         Returns:
             Bed demand forecast with recommendations
         """
-        # Estimate patients needing beds from crowd detection
-        estimated_waiting_patients = average_person_count
-        estimated_peak_patients = peak_person_count
-        
-        # Apply typical ER triage split: ~20% need critical care, ~80% general
-        estimated_critical_need = estimated_waiting_patients * critical_care_ratio
-        estimated_general_need = estimated_waiting_patients * (1 - critical_care_ratio)
-        
-        # Current occupancy rate
-        current_occupancy_rate = (occupied_beds / total_beds) if total_beds > 0 else 0
-        
-        # Projected occupancy with detected patients
-        projected_additional_occupancy = estimated_waiting_patients
-        projected_occupancy_rate = (occupied_beds + projected_additional_occupancy) / total_beds if total_beds > 0 else 1
-        
-        # Lee-Longton adjustment for variance
-        variance_factor = 1.15  # 15% buffer for uncertainty
-        adjusted_projected_occupancy = projected_occupancy_rate * variance_factor
-        
-        # Bed shortage calculation
-        beds_at_capacity = total_beds * 0.95  # 95% is practical max
-        estimated_additional_capacity_needed = max(
-            0,
-            estimated_waiting_patients - available_beds
-        )
-        
-        urgency_level = self._classify_urgency(
-            adjusted_projected_occupancy,
-            estimated_additional_capacity_needed,
-            total_beds
-        )
+        return self._bed_forecast(
+            average_person_count,
+            peak_person_count,
+            total_beds,
+            occupied_beds,
+            available_beds,
+            critical_care_ratio
+        )[0]
+    
+    def _bed_forecast(
+        self,
+        average_person_count: float,
+        peak_person_count: int,
+        total_beds: int,
+        occupied_beds: int,
+        available_beds: int,
+        critical_care_ratio: float = 0.2
+    ) -> Tuple[Dict, Urgency]:
+        """Bed demand forecast plus its Urgency, for callers that branch on it."""
+        forecast = self.calculate_bed_demand_forecasting_batch(
+            [[average_person_count, peak_person_count, total_beds, occupied_beds, available_beds]],
+            critical_care_ratio
+        )[0]
+        (estimated_waiting_patients, current_occupancy_rate, projected_occupancy_rate,
+         estimated_beds_needed, additional_capacity_needed, estimated_critical_need,
+         estimated_general_need) = _round_to(forecast[[0, 1, 2, 0, 3, 4, 5]], _BED_SCALES)
+        urgency = Urgency(int(forecast[6]))
         
         return {
-            "estimated_waiting_patients": round(estimated_waiting_patients, 1),
+            "estimated_waiting_patients": estimated_waiting_patients,
             "estimated_peak_patients": peak_person_count,
-            "current_occupancy_rate": round(current_occupancy_rate, 3),
-            "projected_occupancy_rate": round(adjusted_projected_occupancy, 3),
+            "current_occupancy_rate": current_occupancy_rate,
+            "projected_occupancy_rate": projected_occupancy_rate,
             "current_available_beds": available_beds,
-            "estimated_beds_needed": round(estimated_waiting_patients, 0),
-            "additional_capacity_needed": max(0, round(estimated_additional_capacity_needed, 0)),
-            "critical_care_beds_needed": round(estimated_critical_need, 1),
-            "general_beds_needed": round(estimated_general_need, 1),
-            "urgency_level": urgency_level,
+            "estimated_beds_needed": estimated_beds_needed,
+            "additional_capacity_needed": additional_capacity_needed,
+            "critical_care_beds_needed": estimated_critical_need,
+            "general_beds_needed": estimated_general_need,
+            "urgency_level": _URGENCY_LABELS[urgency],
             "recommendation": self._generate_bed_recommendation(
-                urgency_level,
-                estimated_additional_capacity_needed,
+                urgency,
+                float(forecast[3]),
                 available_beds
             ),
             "algorithm": "Lee-Longton Algorithm + Occupancy Forecasting"
-        }
+        }, urgency
     
     @staticmethod
-    def _classify_urgency(
-        occupancy_rate: float,
-        shortage: float,
-        total_beds: int
-    ) -> str:
-        """Classify urgency level based on occupancy and shortage."""
-        if occupancy_rate >= 1.0 or shortage > 10:
-            return "Critical - Immediate action required"
-        elif occupancy_rate >= 0.9 or shortage > 5:
-            return "High - Plan additional capacity"
-        elif occupancy_rate >= 0.75 or shortage > 2:
-            return "Moderate - Monitor closely"
-        elif occupancy_rate >= 0.6:
-            return "Low - Normal operations"
-        else:
-            return "Very Low - Adequate capacity"
+    def calculate_bed_demand_forecasting_batch(
+        rows,
+        critical_care_ratio: float = 0.2
+    ) -> np.ndarray:
+        """
+        Forecast bed demand for many zones at once.
+        
+        Args:
+            rows: (N, 5) array-like laid out as BED_INPUT_COLUMNS
+            critical_care_ratio: Ratio of critical care beds (0-1)
+            
+        Returns:
+            (N, 7) float array laid out as BED_FORECAST_COLUMNS; the urgency
+            column holds Urgency values
+        """
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(BED_INPUT_COLUMNS))
+        # Assumes: people detected ≈ waiting patients needing beds
+        waiting, _, total_beds, occupied_beds, available_beds = rows.T
+        
+        # Current and projected occupancy (empty wards count as full when projecting)
+        has_beds = total_beds > 0
+        safe_total = np.where(has_beds, total_beds, 1.0)
+        current_occupancy = np.where(has_beds, occupied_beds / safe_total, 0.0)
+        projected_occupancy = np.where(has_beds, (occupied_beds + waiting) / safe_total, 1.0)
+        
+        # Lee-Longton adjustment: 15% buffer for uncertainty
+        adjusted_occupancy = projected_occupancy * 1.15
+        shortage = np.maximum(0, waiting - available_beds)
+        
+        urgency = np.select(
+            [
+                (adjusted_occupancy >= 1.0) | (shortage > 10),
+                (adjusted_occupancy >= 0.9) | (shortage > 5),
+                (adjusted_occupancy >= 0.75) | (shortage > 2),
+                adjusted_occupancy >= 0.6,
+            ],
+            [Urgency.CRITICAL, Urgency.HIGH, Urgency.MODERATE, Urgency.LOW],
+            default=Urgency.VERY_LOW
+        )
+        
+        # Typical ER triage split: ~20% need critical care, ~80% general
+        return np.column_stack([
+            waiting,
+            current_occupancy,
+            adjusted_occupancy,
+            shortage,
+            waiting * critical_care_ratio,
+            waiting * (1 - critical_care_ratio),
+            urgency,
+        ])
     
     @staticmethod
     def _generate_bed_recommendation(
-        urgency: str,
+        urgency: Urgency,
         shortage: float,
         available_beds: int
     ) -> str:
         """Generate bed-related recommendation."""
-        if "Critical" in urgency:
+        if urgency == Urgency.CRITICAL:
             return f"URGENT: Implement surge capacity protocols. Missing ~{int(shortage)} beds. Divert non-critical admissions."
-        elif "High" in urgency:
+        elif urgency == Urgency.HIGH:
             return f"Prepare surge beds and notify administration. Potential shortage of ~{int(shortage)} beds."
-        elif "Moderate" in urgency:
+        elif urgency == Urgency.MODERATE:
             return f"Monitor bed status closely. May need ~{int(shortage)} additional beds soon."
         else:
             return f"Normal operations. Adequate bed capacity available ({available_beds} beds free)."
@@ -367,30 +713,65 @@ class HospitalAnalytics:
         Returns:
             Comprehensive analysis combining all factors
         """
+        # Quantize to the displayed crowd precision (and sub-second durations) so
+        # repeat requests for a zone share one cached result
+        average_person_count = round(average_person_count, 1)
+        video_duration_minutes = round(video_duration_minutes, 2)
+        
+        if average_person_count > 0 and peak_person_count > 0:
+            # Deep copy: callers may mutate the nested analyses and alert list
+            metrics = copy.deepcopy(_cached_comprehensive_metrics(
+                average_person_count,
+                peak_person_count,
+                video_duration_minutes,
+                json.dumps(hospital_context, sort_keys=True, default=str)
+            ))
+        else:
+            metrics = self._comprehensive_metrics(
+                average_person_count,
+                peak_person_count,
+                video_duration_minutes,
+                hospital_context
+            )
+        
+        return {
+            "location": metrics["location"],
+            "analysis_timestamp": _timestamp_iso(),
+            **metrics
+        }
+    
+    def _comprehensive_metrics(
+        self,
+        average_person_count: float,
+        peak_person_count: int,
+        video_duration_minutes: float,
+        hospital_context: Dict
+    ) -> Dict:
+        """Comprehensive metrics without the analysis timestamp."""
         staffing = hospital_context.get("staffing", {})
         resources = hospital_context.get("resources", {})
         area_sqm = hospital_context.get("area_sqm", 100.0)
         location = hospital_context.get("location_name", "Hospital Area")
         
         # Extract values with defaults
-        current_nurses = staffing.get("total_nurses", 0)
         available_nurses = staffing.get("available_nurses", 0)
         total_beds = resources.get("total_beds", 0)
         occupied_beds = resources.get("occupied_beds", 0)
         available_beds = resources.get("available_beds", 0)
         
-        # Calculate staffing recommendations
-        staffing_rec = self.calculate_optimal_staffing(
+        # Calculate staffing recommendations, keeping the raw sweep for the helpers
+        staffing_ctx = self._staffing_context(
             average_person_count,
             peak_person_count,
-            current_nurses,
             available_nurses,
             video_duration_minutes,
+            target_wait_time_minutes=10.0,
             area_sqm=area_sqm
         )
+        staffing_rec = self._format_staffing(staffing_ctx)
         
         # Calculate bed demand
-        bed_rec = self.calculate_bed_demand_forecasting(
+        bed_rec, bed_urgency = self._bed_forecast(
             average_person_count,
             peak_person_count,
             total_beds,
@@ -400,7 +781,7 @@ class HospitalAnalytics:
         
         # Overall capacity score (0-100)
         capacity_score = self._calculate_capacity_score(
-            staffing_rec,
+            staffing_ctx,
             bed_rec,
             available_nurses,
             available_beds
@@ -408,12 +789,11 @@ class HospitalAnalytics:
         
         return {
             "location": location,
-            "analysis_timestamp": datetime.now().isoformat(),
             "staffing_analysis": staffing_rec,
             "bed_analysis": bed_rec,
             "capacity_score": round(capacity_score, 1),
             "overall_status": self._classify_status(capacity_score),
-            "critical_alerts": self._generate_alerts(staffing_rec, bed_rec),
+            "critical_alerts": self._generate_alerts(staffing_ctx, bed_rec, bed_urgency),
             "summary": self._generate_comprehensive_summary(
                 average_person_count,
                 staffing_rec,
@@ -424,21 +804,18 @@ class HospitalAnalytics:
     
     @staticmethod
     def _calculate_capacity_score(
-        staffing_rec: Dict,
+        staffing_ctx: _StaffingCtx,
         bed_rec: Dict,
         available_nurses: int,
         available_beds: int
     ) -> float:
         """Calculate overall capacity score (0-100)."""
-        # Staffing component (0-50)
-        staffing_component = min(50, (available_nurses / max(1, staffing_rec["recommended_nurses"])) * 50)
-        
-        # Bed component (0-50)
-        bed_component = min(50, (available_beds / max(1, bed_rec["estimated_beds_needed"])) * 50) if bed_rec["estimated_beds_needed"] > 0 else 50
-        
-        total_score = staffing_component + bed_component
-        
-        return max(0, min(100, total_score))
+        return float(_capacity_scores(
+            available_nurses,
+            staffing_ctx.recommended_nurses,
+            available_beds,
+            bed_rec["estimated_beds_needed"]
+        ))
     
     @staticmethod
     def _classify_status(capacity_score: float) -> str:
@@ -455,27 +832,27 @@ class HospitalAnalytics:
             return "Critical - Severe strain"
     
     @staticmethod
-    def _generate_alerts(staffing_rec: Dict, bed_rec: Dict) -> List[str]:
+    def _generate_alerts(staffing_ctx: _StaffingCtx, bed_rec: Dict, bed_urgency: Urgency) -> List[str]:
         """Generate critical alerts based on analysis."""
         alerts = []
         
         # Staffing alerts
-        additional_staff = staffing_rec.get("additional_nurses_needed", 0)
+        additional_staff = staffing_ctx.additional_nurses
         if additional_staff >= 3:
             alerts.append(f"CRITICAL: Need {additional_staff} additional nurses to meet optimal staffing")
         elif additional_staff >= 1:
             alerts.append(f"WARNING: Need {additional_staff} additional nurse(s)")
         
         # Bed alerts
-        additional_beds = bed_rec.get("additional_capacity_needed", 0)
-        if "Critical" in bed_rec.get("urgency_level", ""):
+        additional_beds = bed_rec["additional_capacity_needed"]
+        if bed_urgency == Urgency.CRITICAL:
             alerts.append(f"CRITICAL: Bed shortage of {int(additional_beds)} beds")
-        elif "High" in bed_rec.get("urgency_level", ""):
+        elif bed_urgency == Urgency.HIGH:
             alerts.append(f"WARNING: May need {int(additional_beds)} additional beds")
         
         # Wait time alerts
-        wait_time = staffing_rec.get("predicted_wait_time_minutes", 0)
-        if isinstance(wait_time, (int, float)) and wait_time > 30:
+        wait_time = round(staffing_ctx.wait_time, 1)
+        if wait_time != float('inf') and wait_time > 30:
             alerts.append(f"Alert: Predicted wait time {wait_time:.0f} minutes (target: 10 min)")
         
         return alerts
@@ -508,3 +885,19 @@ class HospitalAnalytics:
             summary += f"Expected wait time: {wait_time:.0f} minutes."
         
         return summary
+
+
+@functools.lru_cache(maxsize=512)
+def _cached_comprehensive_metrics(
+    average_person_count: float,
+    peak_person_count: int,
+    video_duration_minutes: float,
+    hospital_context_json: str
+) -> Dict:
+    """Memoized HospitalAnalytics._comprehensive_metrics keyed by canonical context JSON."""
+    return HospitalAnalytics()._comprehensive_metrics(
+        average_person_count,
+        peak_person_count,
+        video_duration_minutes,
+        json.loads(hospital_context_json)
+    )
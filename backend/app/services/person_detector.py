@@ -3,9 +3,13 @@ Person Detector Service
 YOLOv8-based person detection for video analysis.
 """
 
+import heapq
+import json
 import logging
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 import numpy as np
 import torch
 
@@ -48,14 +52,27 @@ class PersonDetector:
     - Person-only detection (class 0 in COCO dataset)
     - Configurable confidence threshold
     - Bounding box and count extraction
+    - Optional OpenVINO / TensorRT inference backends
     """
     
+    # Detector input size (Ultralytics default imgsz); frames are letterboxed to it
+    INPUT_SIZE = 640
+    
+    # Export format per accelerated backend (Ultralytics format names)
+    EXPORT_BACKENDS = {
+        "openvino": "openvino",
+        "tensorrt": "engine",
+    }
+    
     def __init__(
         self,
         model_name: str = "yolov8n.pt",  # nano model (fastest)
         confidence_threshold: float = 0.5,
         device: Optional[str] = None,
-        model_dir: Optional[Path] = None
+        model_dir: Optional[Path] = None,
+        backend: str = "pytorch",  # pytorch, openvino or tensorrt
+        batch_size: int = 8,  # Largest batch an exported model must accept
+        model_path: Optional[Path] = None  # Prebuilt model, e.g. INT8 OpenVINO IR
     ):
         """
         Initialize the PersonDetector.
@@ -65,14 +82,30 @@ class PersonDetector:
             confidence_threshold: Minimum confidence for detection (0.0-1.0)
             device: Device to run model on ('cpu', 'cuda', or None for auto)
             model_dir: Directory to store/load model weights
+            backend: Inference backend; exported models are built once and reused
+            batch_size: Maximum batch size compiled into exported models
+            model_path: Already exported model to load instead of exporting
+                (see quantize_yolo.py); requires a non-pytorch backend
+            
+        Raises:
+            ValueError: If backend is not supported
         """
+        if backend != "pytorch" and backend not in self.EXPORT_BACKENDS:
+            raise ValueError(f"Unsupported detector backend: {backend}")
+        if model_path is not None and backend == "pytorch":
+            raise ValueError("model_path requires the openvino or tensorrt backend")
+        
         self.model_name = model_name
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.model_path = Path(model_path) if model_path is not None else None
         self.confidence_threshold = confidence_threshold
         self.model_dir = model_dir or Path("models")
         self.model_dir.mkdir(parents=True, exist_ok=True)
         
         # COCO class ID for person (must be set before loading model)
         self.person_class_id = 0
+        self._inference_lock = threading.Lock()
         
         # Auto-detect device
         if device is None:
@@ -80,7 +113,7 @@ class PersonDetector:
         else:
             self.device = device
         
-        logger.info(f"Initializing PersonDetector with {model_name} on {self.device}")
+        logger.info(f"Initializing PersonDetector with {model_name} ({backend}) on {self.device}")
         
         # Load model
         self.model = self._load_model()
@@ -99,11 +132,20 @@ class PersonDetector:
             # YOLOv8 will automatically download if not found
             model = YOLO(self.model_name)
             
-            # Move to device
-            model.to(self.device)
+            # Exported models don't carry class names until first inference
+            self.class_names = dict(model.names)
+            
+            if self.model_path is not None:
+                model = YOLO(str(self.model_path), task="detect")
+                self._log_quantization_report()
+            elif self.backend == "pytorch":
+                # Move to device
+                model.to(self.device)
+            else:
+                model = YOLO(self._export_model(model), task="detect")
             
             logger.info(f"Model loaded: {self.model_name}")
-            logger.info(f"Model classes: {len(model.names)} (person is class {self.person_class_id})")
+            logger.info(f"Model classes: {len(self.class_names)} (person is class {self.person_class_id})")
             
             return model
             
@@ -111,6 +153,68 @@ class PersonDetector:
             logger.error(f"Error loading model: {e}")
             raise
     
+    def _export_model(self, model: YOLO) -> str:
+        """
+        Export the PyTorch model for the configured backend, reusing a previous export.
+        
+        Args:
+            model: Loaded PyTorch YOLO model
+            
+        Returns:
+            Path to the exported model
+        """
+        weights = Path(model.ckpt_path)
+        if self.backend == "openvino":
+            exported = weights.with_name(f"{weights.stem}_openvino_model")
+        else:
+            exported = weights.with_suffix(".engine")
+        
+        if exported.exists():
+            logger.info(f"Using cached {self.backend} model: {exported}")
+            return str(exported)
+        
+        logger.info(f"Exporting {self.model_name} to {self.backend} (batch up to {self.batch_size})")
+        # Dynamic batch so the last, partial batch of a video still runs.
+        # OpenVINO exports on CPU, where Ultralytics can't combine half with dynamic
+        return model.export(
+            format=self.EXPORT_BACKENDS[self.backend],
+            dynamic=True,
+            batch=self.batch_size,
+            half=self.backend == "tensorrt",
+            device=0 if self.backend == "tensorrt" else "cpu"
+        )
+    
+    def _log_quantization_report(self):
+        """Log the accuracy delta recorded by quantize_yolo.py, if any."""
+        report_path = self.model_path / "quantization.json"
+        if not report_path.exists():
+            return
+        
+        try:
+            report = json.loads(report_path.read_text())
+            logger.info(
+                f"Quantized model {self.model_path.name}: mean person count delta "
+                f"{report['mean_count_delta']:.3f} over {report['frames']} frames "
+                f"(FP32 avg {report['fp32_avg_count']:.2f}, INT8 avg {report['int8_avg_count']:.2f})"
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read quantization report: {e}")
+    
+    def _predict(self, source):
+        """
+        Run person-only inference.
+        
+        Serialized because one detector may be shared by concurrent analyses,
+        and an Ultralytics predictor is not thread-safe.
+        """
+        with self._inference_lock:
+            return self.model(
+                source,
+                conf=self.confidence_threshold,
+                classes=[self.person_class_id],  # Only detect persons
+                verbose=False
+            )
+    
     def detect_persons(
         self,
         frame: np.ndarray,
@@ -139,12 +243,7 @@ class PersonDetector:
         """
         try:
             # Run inference
-            results = self.model(
-                frame,
-                conf=self.confidence_threshold,
-                classes=[self.person_class_id],  # Only detect persons
-                verbose=False
-            )
+            results = self._predict(frame)
             
             # Extract results
             result = results[0]  # First (and only) image
@@ -168,7 +267,7 @@ class PersonDetector:
                         "bbox": coords.tolist(),  # [x1, y1, x2, y2]
                         "confidence": float(box.conf[0].cpu().numpy()),
                         "class_id": int(box.cls[0].cpu().numpy()),
-                        "class_name": self.model.names[int(box.cls[0])]
+                        "class_name": self.class_names[int(box.cls[0])]
                     }
                     
                     detections.append(detection)
@@ -201,13 +300,7 @@ class PersonDetector:
         """
         try:
             # Run batch inference
-            results = self.model(
-                frames,
-                conf=self.confidence_threshold,
-                classes=[self.person_class_id],
-                verbose=False,
-                stream=True  # Memory efficient streaming
-            )
+            results = self._predict(frames)
             
             batch_results = []
             
@@ -230,7 +323,7 @@ class PersonDetector:
                             "bbox": coords.tolist(),
                             "confidence": float(box.conf[0].cpu().numpy()),
                             "class_id": int(box.cls[0].cpu().numpy()),
-                            "class_name": self.model.names[int(box.cls[0])]
+                            "class_name": self.class_names[int(box.cls[0])]
                         }
                         
                         detections.append(detection)
@@ -260,12 +353,7 @@ class PersonDetector:
         """
         try:
             # Run inference with visualization
-            results = self.model(
-                frame,
-                conf=self.confidence_threshold,
-                classes=[self.person_class_id],
-                verbose=False
-            )
+            results = self._predict(frame)
             
             result = results[0]
             
@@ -299,7 +387,8 @@ class PersonDetector:
             "device": self.device,
             "confidence_threshold": self.confidence_threshold,
             "person_class_id": self.person_class_id,
-            "total_classes": len(self.model.names),
+            "backend": self.backend,
+            "total_classes": len(self.class_names),
             "cuda_available": torch.cuda.is_available(),
             "model_type": str(type(self.model))
         }
@@ -350,23 +439,61 @@ class PersonDetector:
         return center_x, center_y
 
 
+@dataclass
+class DetectionBatch:
+    """
+    Per-frame person counts and timestamps as flat arrays.
+    
+    Built once from the detection results so aggregations (statistics, peaks,
+    timeline) run as vectorized NumPy instead of re-walking the list of dicts.
+    """
+    counts: np.ndarray  # int64 person count per frame
+    timestamps: np.ndarray  # float64 seconds per frame
+    
+    @classmethod
+    def from_results(cls, detections: List[Dict], frames_data: List[Dict]) -> "DetectionBatch":
+        """
+        Build from detection results and their frame metadata.
+        
+        Args:
+            detections: List of detection results
+            frames_data: List of frame metadata (only "timestamp" is read)
+            
+        Returns:
+            DetectionBatch covering the frames present in both lists
+        """
+        frame_count = min(len(detections), len(frames_data))
+        counts = np.fromiter(
+            (d.get("person_count", 0) for d in detections[:frame_count]),
+            dtype=np.int64, count=frame_count
+        )
+        timestamps = np.fromiter(
+            (frame_data["timestamp"] for frame_data in frames_data[:frame_count]),
+            dtype=np.float64, count=frame_count
+        )
+        return cls(counts=counts, timestamps=timestamps)
+    
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
 class DetectionStats:
     """
     Helper class for calculating detection statistics across frames.
     """
     
     @staticmethod
-    def calculate_statistics(detections: List[Dict]) -> Dict:
+    def calculate_statistics(detections: Union[List[Dict], DetectionBatch]) -> Dict:
         """
         Calculate statistics from multiple frame detections.
         
         Args:
-            detections: List of detection results from multiple frames
+            detections: Detection results from multiple frames, as a list or DetectionBatch
             
         Returns:
             Dictionary with statistics
         """
-        if not detections:
+        if not len(detections):
             return {
                 "total_frames": 0,
                 "average_person_count": 0,
@@ -375,7 +502,10 @@ class DetectionStats:
                 "total_detections": 0
             }
         
-        person_counts = [d.get("person_count", 0) for d in detections]
+        if isinstance(detections, DetectionBatch):
+            person_counts = detections.counts
+        else:
+            person_counts = [d.get("person_count", 0) for d in detections]
         
         return {
             "total_frames": len(detections),
@@ -389,7 +519,7 @@ class DetectionStats:
     
     @staticmethod
     def find_peak_frames(
-        detections: List[Dict],
+        detections: Union[List[Dict], DetectionBatch],
         frames_data: List[Dict],
         top_n: int = 5
     ) -> List[Dict]:
@@ -397,16 +527,30 @@ class DetectionStats:
         Find frames with highest person counts.
         
         Args:
-            detections: List of detection results
+            detections: Detection results, as a list or DetectionBatch
             frames_data: List of frame metadata
             top_n: Number of top frames to return
             
         Returns:
             List of top N frames with highest person counts
         """
-        if not detections or not frames_data:
+        if not len(detections) or not frames_data:
             return []
         
+        if isinstance(detections, DetectionBatch):
+            # Stable sort keeps earlier frames first among equal counts
+            counts = detections.counts[:len(frames_data)]
+            top = np.argsort(-counts, kind="stable")[:top_n]
+            return [
+                {
+                    "frame_number": frames_data[i].get("frame_number"),
+                    "timestamp": frames_data[i].get("timestamp"),
+                    "timestamp_formatted": frames_data[i].get("timestamp_formatted"),
+                    "person_count": int(counts[i])
+                }
+                for i in top.tolist()
+            ]
+        
         # Combine detections with frame data
         combined = []
         for detection, frame_data in zip(detections, frames_data):
@@ -417,7 +561,5 @@ class DetectionStats:
                 "person_count": detection.get("person_count", 0)
             })
         
-        # Sort by person count and get top N
-        sorted_frames = sorted(combined, key=lambda x: x["person_count"], reverse=True)
-        
-        return sorted_frames[:top_n]
+        # Top N by person count (same order as a stable descending sort)
+        return heapq.nlargest(top_n, combined, key=lambda x: x["person_count"])
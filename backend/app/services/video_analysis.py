@@ -5,21 +5,76 @@ Main pipeline combining video processing and person detection.
 
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Callable
+from typing import Dict, Iterable, Iterator, List, Optional, Callable, Tuple
 from datetime import datetime
+import functools
+import itertools
 import json
+import math
 import numpy as np
 import cv2
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import threading
+import time
 
-from .video_processor import VideoProcessor
-from .person_detector import PersonDetector, DetectionStats
+from .video_processor import VideoProcessor, create_video_writer
+from .person_detector import PersonDetector, DetectionBatch, DetectionStats
 from .analytics import CrowdAnalytics
 from .gemini_assistant import GeminiAssistant
 from .hospital_analytics import HospitalAnalytics
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for AI insight generation, overlapped with the rest of the pipeline
+_AI_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ai-insights")
+AI_INSIGHTS_TIMEOUT = float(os.getenv("AI_INSIGHTS_TIMEOUT", "30"))  # Seconds
+
+
+# Per-frame keys only needed during detection, dropped from the metadata kept after it
+_DETECTION_ONLY_KEYS = ("frame", "inference_frame", "inference_scale")
+
+# Crowd level bands: < 5 Low, < 15 Moderate, < 25 High, otherwise Very High
+_CROWD_BINS = np.array([5, 15, 25])
+_CROWD_LABELS = ("Low", "Moderate", "High", "Very High")
+_CROWD_COLORS = ((0, 255, 0), (0, 255, 255), (0, 165, 255), (0, 0, 255))  # Green, yellow, orange, red (BGR)
+
+
+def _crowd_level_index(person_count):
+    """Crowd level band of a person count (or array of counts)."""
+    # side="right" so a count equal to a threshold falls in the band above it
+    return np.searchsorted(_CROWD_BINS, person_count, side="right")
+
+
+@functools.lru_cache(maxsize=4)
+def _get_shared_detector(
+    confidence_threshold: float,
+    device: Optional[str],
+    backend: str,
+    batch_size: int,
+    model_path: Optional[str]
+) -> PersonDetector:
+    """
+    Return a PersonDetector for this configuration, loading it on first use.
+    
+    The service is built per request, so sharing the detector keeps model
+    loading (and any export) out of every request after the first.
+    """
+    return PersonDetector(
+        confidence_threshold=confidence_threshold,
+        device=device,
+        backend=backend,
+        batch_size=batch_size,
+        model_path=model_path
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _label_size(label: str) -> Tuple[int, int]:
+    """Pixel size of a detection label; labels repeat ("Person 0.50".."Person 1.00")."""
+    return cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
+
 
 class VideoAnalysisService:
     """
@@ -31,6 +86,16 @@ class VideoAnalysisService:
     - Statistics calculation (DetectionStats)
     """
     
+    # Height in pixels of the translucent info panel drawn on annotated frames
+    INFO_PANEL_HEIGHT = 80
+    
+    # Most frames per second shown in the live display; others skip imshow/waitKey
+    DISPLAY_FPS_CAP = 30
+    
+    # Draw annotations through OpenCV's T-API (OpenCL) when a device is available.
+    # Off by default: per-frame upload/download usually outweighs the drawing cost
+    use_gpu_draw = os.getenv("GPU_DRAW", "false").lower() == "true"
+    
     def __init__(
         self,
         frame_sample_rate: int = 30,  # Process every Nth frame (30 = ~1 per second at 30fps)
@@ -42,7 +107,9 @@ class VideoAnalysisService:
         output_video_path: Optional[Path] = None,  # Path for annotated video
         enable_ai_insights: bool = True,  # Enable AI insights generation
         gemini_api_key: Optional[str] = None,  # Gemini API key (or from env)
-        hospital_context: Optional[Dict] = None  # Hospital staffing and resource data
+        hospital_context: Optional[Dict] = None,  # Hospital staffing and resource data
+        batch_size: int = 8,  # Frames per YOLO forward pass
+        detector_backend: Optional[str] = None  # pytorch, openvino or tensorrt (or from env)
     ):
         """
         Initialize the VideoAnalysisService.
@@ -58,15 +125,23 @@ class VideoAnalysisService:
             enable_ai_insights: Enable AI-powered insights generation
             gemini_api_key: Google Gemini API key (or load from GEMINI_API_KEY env var)
             hospital_context: Hospital staffing and resource data for context-aware analysis
+            batch_size: Number of frames sent to the detector per inference call
+            detector_backend: YOLO inference backend (or load from DETECTOR_BACKEND env var)
         """
         self.video_processor = VideoProcessor(
             frame_sample_rate=frame_sample_rate,
-            max_frames=max_frames
+            max_frames=max_frames,
+            inference_size=PersonDetector.INPUT_SIZE  # Downscale on the decode thread
         )
         
-        self.person_detector = PersonDetector(
-            confidence_threshold=confidence_threshold,
-            device=device
+        self.batch_size = max(1, batch_size)
+        
+        self.person_detector = _get_shared_detector(
+            confidence_threshold,
+            device,
+            detector_backend or os.getenv("DETECTOR_BACKEND", "pytorch"),
+            self.batch_size,
+            os.getenv("DETECTOR_MODEL_PATH") or None
         )
         
         self.analytics = CrowdAnalytics()
@@ -120,6 +195,7 @@ class VideoAnalysisService:
             Complete analysis results dictionary
         """
         start_time = datetime.now()
+        start_counter = time.perf_counter()  # Monotonic clock for the duration
         
         try:
             logger.info(f"Starting video analysis: {video_path.name}")
@@ -131,41 +207,33 @@ class VideoAnalysisService:
             metadata = self.video_processor.get_video_metadata(video_path)
             logger.info(f"Video metadata: {metadata['duration_formatted']} duration, {metadata['fps']:.1f} fps")
             
-            # Step 2: Extract frames
+            # Steps 2-3: Stream frames through person detection; decoded pixels
+            # are dropped after each batch, only per-frame metadata is kept
             if progress_callback:
-                progress_callback(10, 100, "Extracting frames...")
+                progress_callback(10, 100, "Extracting frames and detecting people...")
             
-            frames_data = self._extract_frames_with_progress(
-                video_path,
+            frames_data, detections = self._detect_people_in_frames(
+                self._prefetch_frames(video_path),
+                metadata["estimated_frames_to_process"],
                 progress_callback
             )
             
             if not frames_data:
                 raise ValueError("No frames extracted from video")
             
-            logger.info(f"Extracted {len(frames_data)} frames")
-            
-            # Step 3: Detect people in frames
-            if progress_callback:
-                progress_callback(50, 100, "Detecting people in frames...")
-            
-            detections = self._detect_people_in_frames(
-                frames_data,
-                progress_callback
-            )
-            
             logger.info(f"Person detection complete for {len(detections)} frames")
             
             # Step 4: Calculate statistics
             if progress_callback:
                 progress_callback(90, 100, "Calculating statistics...")
             
-            statistics = DetectionStats.calculate_statistics(detections)
-            peak_frames = DetectionStats.find_peak_frames(detections, frames_data, top_n=5)
+            detection_batch = DetectionBatch.from_results(detections, frames_data)
+            statistics = DetectionStats.calculate_statistics(detection_batch)
+            peak_frames = DetectionStats.find_peak_frames(detection_batch, frames_data, top_n=5)
             
             # Step 5: Compile results
+            processing_time = time.perf_counter() - start_counter
             end_time = datetime.now()
-            processing_time = (end_time - start_time).total_seconds()
             
             results = {
                 "status": "completed",
@@ -180,7 +248,7 @@ class VideoAnalysisService:
                 },
                 "statistics": statistics,
                 "peak_congestion_frames": peak_frames,
-                "timeline": self._generate_timeline(frames_data, detections)
+                "timeline": self._generate_timeline(detection_batch)
             }
             
             # Add insights
@@ -194,6 +262,16 @@ class VideoAnalysisService:
                 detections, frames_data, metadata
             )
             
+            # Gemini only reads what is in results so far (not hospital_analytics),
+            # so start it now and let the hospital analytics run meanwhile
+            ai_future = None
+            if self.enable_ai_insights and self.gemini_assistant:
+                ai_future = _AI_EXECUTOR.submit(
+                    self.gemini_assistant.generate_insights,
+                    dict(results),
+                    include_recommendations=True
+                )
+            
             # Add Phase 4.5: Hospital Context Analytics (90-93%)
             if self.hospital_context:
                 if progress_callback:
@@ -213,17 +291,20 @@ class VideoAnalysisService:
                     results["hospital_analytics"] = {"error": "Hospital analytics failed", "message": str(e)}
             
             # Phase 5: AI-powered insights (93-98%)
-            if self.enable_ai_insights and self.gemini_assistant:
+            if ai_future is not None:
                 if progress_callback:
                     progress_callback(95, 100, "Generating AI insights...")
                 
                 try:
-                    ai_insights = self.gemini_assistant.generate_insights(
-                        results,
-                        include_recommendations=True
-                    )
+                    ai_insights = ai_future.result(timeout=AI_INSIGHTS_TIMEOUT)
                     results["ai_insights"] = ai_insights
                     logger.info(f"AI insights generated: {ai_insights.get('generated_by', 'unknown')}")
+                except FuturesTimeoutError:
+                    logger.error(f"AI insights timed out after {AI_INSIGHTS_TIMEOUT:.0f}s")
+                    results["ai_insights"] = {
+                        "error": "AI insights generation failed",
+                        "message": f"Timed out after {AI_INSIGHTS_TIMEOUT:.0f}s"
+                    }
                 except Exception as e:
                     logger.error(f"Error generating AI insights: {e}")
                     # Don't fail the entire analysis - continue without AI insights
@@ -249,44 +330,98 @@ class VideoAnalysisService:
                 "video_path": str(video_path)
             }
     
-    def _extract_frames_with_progress(
-        self,
-        video_path: Path,
-        progress_callback: Optional[Callable] = None
-    ) -> List[Dict]:
-        """Extract frames with progress tracking."""
-        frames = []
-        
-        def frame_progress(current, total, frame_data):
-            frames.append(frame_data)
-            if progress_callback:
-                # Map to 10-50% of total progress
-                progress = 10 + int((current / total) * 40)
-                progress_callback(progress, 100, f"Extracting frames: {current}/{total}")
+    def _prefetch_frames(self, video_path: Path) -> Iterator[Dict]:
+        """
+        Decode frames on a background thread so decoding overlaps inference.
         
-        self.video_processor.extract_frames(video_path, progress_callback=frame_progress)
+        Args:
+            video_path: Path to video file
+            
+        Yields:
+            Frame data dictionaries from VideoProcessor.iter_frames, in order
+        """
+        frame_queue = queue.Queue(maxsize=self.batch_size * 2)
+        stop = threading.Event()
+        done = object()
+        
+        # Full-resolution frames are only needed for annotation
+        keep_full_frame = self.show_visual or self.save_annotated_video
+        
+        def decode():
+            try:
+                for frame_data in self.video_processor.iter_frames(
+                    video_path, keep_full_frame=keep_full_frame
+                ):
+                    # Poll so an abandoned consumer can't block this thread forever
+                    while not stop.is_set():
+                        try:
+                            frame_queue.put(frame_data, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+                frame_queue.put(done)
+            except Exception as e:
+                frame_queue.put(e)
+        
+        decoder_thread = threading.Thread(target=decode, daemon=True)
+        decoder_thread.start()
         
-        return frames
+        try:
+            while True:
+                item = frame_queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            # Unblock a decoder waiting on a full queue, then let it release the video
+            while not frame_queue.empty():
+                frame_queue.get_nowait()
+            decoder_thread.join()
     
     def _detect_people_in_frames(
         self,
-        frames_data: List[Dict],
+        frames: Iterable[Dict],
+        total_frames: int,
         progress_callback: Optional[Callable] = None
-    ) -> List[Dict]:
-        """Detect people in all frames with progress tracking and visual display."""
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Detect people in streamed frames with progress tracking and visual display.
+        
+        Args:
+            frames: Frame data dictionaries, e.g. from VideoProcessor.iter_frames
+            total_frames: Expected number of frames, for progress reporting
+            progress_callback: Optional callback(current, total, status_message)
+            
+        Returns:
+            Tuple of (frame metadata without pixel data, detection results)
+        """
+        frames_data = []
         detections = []
-        total_frames = len(frames_data)
+        total_frames = max(total_frames, 1)
+        # At most ~100 progress updates per analysis, however long the video
+        progress_every = max(1, total_frames // 100)
+        frames = iter(frames)
+        
+        # Peek at the first frame to size the video writer
+        first_frame_data = next(frames, None)
+        if first_frame_data is None:
+            return frames_data, detections
+        first_frame = first_frame_data["frame"]
+        frames = itertools.chain([first_frame_data], frames)
         
         # Initialize video writer if saving annotated video
-        if self.save_annotated_video and self.output_video_path and frames_data:
-            first_frame = frames_data[0]["frame"]
+        if self.save_annotated_video and self.output_video_path:
             height, width = first_frame.shape[:2]
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            self.video_writer = cv2.VideoWriter(
-                str(self.output_video_path),
-                fourcc,
+            self.video_writer = create_video_writer(
+                self.output_video_path,
                 30.0,  # FPS
-                (width, height)
+                (width, height),
+                encoder=os.getenv("VIDEO_ENCODER", "auto")
             )
             logger.info(f"Saving annotated video to: {self.output_video_path}")
         
@@ -296,53 +431,132 @@ class VideoAnalysisService:
             cv2.resizeWindow('Person Detection - Press Q to quit', 1280, 720)
             logger.info("Real-time visual display enabled - Press 'Q' to quit")
         
-        for idx, frame_data in enumerate(frames_data):
-            frame = frame_data["frame"].copy()  # Make a copy for annotation
-            
-            # Detect people with bounding boxes
-            detection = self.person_detector.detect_persons(frame, return_boxes=True)
-            detections.append(detection)
-            
-            # Draw bounding boxes and info on frame
-            annotated_frame = self._draw_detections(
-                frame,
-                detection,
-                frame_data["frame_number"],
-                frame_data["timestamp_formatted"]
+        # Live display is rate limited so the GUI doesn't stall detection
+        display_interval = 1.0 / self.DISPLAY_FPS_CAP
+        last_display = float("-inf")
+        
+        # Annotate and encode on a writer thread so encoding overlaps the next batch
+        write_queue = None
+        writer_thread = None
+        if self.video_writer is not None:
+            write_queue = queue.Queue(maxsize=self.batch_size * 2)
+            writer_thread = threading.Thread(
+                target=self._write_annotated_frames,
+                args=(write_queue,),
+                daemon=True
             )
-            
-            # Show visual display
-            if self.show_visual:
-                cv2.imshow('Person Detection - Press Q to quit', annotated_frame)
+            writer_thread.start()
+        
+        video_saved = False
+        try:
+            while True:
+                batch = list(itertools.islice(frames, self.batch_size))
+                if not batch:
+                    break
+                batch_start = len(detections)
                 
-                # Wait 1ms and check for 'q' key press
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q') or key == ord('Q'):
-                    logger.info("User requested to quit visual display")
-                    self.show_visual = False  # Stop showing but continue processing
-            
-            # Save to video file
-            if self.video_writer is not None:
-                self.video_writer.write(annotated_frame)
-            
-            if progress_callback and (idx % 10 == 0 or idx == total_frames - 1):
-                # Map to 50-90% of total progress
-                progress = 50 + int((idx / total_frames) * 40)
-                progress_callback(
-                    progress, 
-                    100, 
-                    f"Detecting people: {idx + 1}/{total_frames}"
+                # Detect people with bounding boxes, one forward pass per batch
+                batch_detections = self.person_detector.detect_batch(
+                    [frame_data.get("inference_frame", frame_data["frame"]) for frame_data in batch],
+                    return_boxes=True
                 )
+                for frame_data, detection in zip(batch, batch_detections):
+                    if "inference_scale" in frame_data:
+                        self._rescale_boxes(detection, 1 / frame_data["inference_scale"])
+                
+                for idx, frame_data, detection in zip(
+                    range(batch_start, batch_start + len(batch)), batch, batch_detections
+                ):
+                    detections.append(detection)
+                    frames_data.append({
+                        k: v for k, v in frame_data.items() if k not in _DETECTION_ONLY_KEYS
+                    })
+                    annotated_frame = None
+                    
+                    # Show visual display (HighGUI must stay on this thread).
+                    # Streamed frames aren't reused once queued, so annotate in place;
+                    # frames skipped here are annotated by the writer if needed
+                    if self.show_visual and time.perf_counter() - last_display >= display_interval:
+                        last_display = time.perf_counter()
+                        annotated_frame = self._draw_detections(
+                            frame_data["frame"],
+                            detection,
+                            frame_data["frame_number"],
+                            frame_data["timestamp_formatted"]
+                        )
+                        cv2.imshow('Person Detection - Press Q to quit', annotated_frame)
+                        
+                        # Wait 1ms and check for 'q' key press
+                        key = cv2.waitKey(1) & 0xFF
+                        if key == ord('q') or key == ord('Q'):
+                            logger.info("User requested to quit visual display")
+                            self.show_visual = False  # Stop showing but continue processing
+                    
+                    # Hand off to the writer thread
+                    if write_queue is not None:
+                        write_queue.put((frame_data, detection, annotated_frame))
+                    
+                    if progress_callback and (idx % progress_every == 0 or idx == total_frames - 1):
+                        # Map to 10-90% of total progress
+                        progress = 10 + int((min(idx, total_frames) / total_frames) * 80)
+                        progress_callback(
+                            progress, 
+                            100, 
+                            f"Detecting people: {idx + 1}/{total_frames}"
+                        )
+        finally:
+            if writer_thread is not None:
+                write_queue.put(None)
+                writer_thread.join()
+            # Release even on error so the ffmpeg child doesn't outlive the analysis
+            if self.video_writer is not None:
+                # cv2.VideoWriter.release() returns None; only ffmpeg reports failure
+                video_saved = self.video_writer.release() is not False
+                self.video_writer = None
         
         # Cleanup
         if self.show_visual:
             cv2.destroyAllWindows()
         
-        if self.video_writer is not None:
-            self.video_writer.release()
+        if video_saved:
             logger.info(f"Annotated video saved successfully")
+        elif writer_thread is not None:
+            logger.warning("Annotated video could not be saved")
         
-        return detections
+        return frames_data, detections
+    
+    @staticmethod
+    def _rescale_boxes(detection: Dict, factor: float):
+        """Scale detection boxes in place, e.g. from inference to full frame coordinates."""
+        for det in detection.get("detections", []):
+            det["bbox"] = [coord * factor for coord in det["bbox"]]
+    
+    def _write_annotated_frames(self, write_queue: queue.Queue):
+        """Writer thread: annotate queued frames and encode them until a None sentinel."""
+        write_failed = False
+        
+        while True:
+            item = write_queue.get()
+            if item is None:
+                break
+            
+            # Keep draining after a failure so the detection loop never blocks
+            if write_failed:
+                continue
+            
+            frame_data, detection, annotated_frame = item
+            try:
+                if annotated_frame is None:
+                    annotated_frame = self._draw_detections(
+                        frame_data["frame"],
+                        detection,
+                        frame_data["frame_number"],
+                        frame_data["timestamp_formatted"]
+                    )
+                self.video_writer.write(annotated_frame)
+            except Exception as e:
+                logger.error(f"Error writing annotated frame: {e}")
+                write_failed = True
     
     def _format_frame_detections(
         self,
@@ -364,63 +578,49 @@ class VideoAnalysisService:
     
     def _generate_timeline(
         self,
-        frames_data: List[Dict],
-        detections: List[Dict],
+        detection_batch: DetectionBatch,
         interval_seconds: int = 30
     ) -> List[Dict]:
         """
         Generate timeline summary with aggregated counts per time interval.
         
         Args:
-            frames_data: List of frame data
-            detections: List of detection results
+            detection_batch: Per-frame person counts and timestamps
             interval_seconds: Time interval for aggregation
             
         Returns:
             List of time intervals with statistics
         """
-        if not frames_data or not detections:
+        if not len(detection_batch):
             return []
         
-        timeline = []
-        current_interval_start = 0
-        interval_detections = []
+        timestamps = detection_batch.timestamps
+        person_counts = detection_batch.counts
+        frame_count = len(detection_batch)
         
-        for frame_data, detection in zip(frames_data, detections):
-            timestamp = frame_data["timestamp"]
-            
-            # Check if we need to start a new interval
-            if timestamp >= current_interval_start + interval_seconds:
-                if interval_detections:
-                    # Calculate stats for current interval
-                    person_counts = [d.get("person_count", 0) for d in interval_detections]
-                    timeline.append({
-                        "interval_start": current_interval_start,
-                        "interval_end": current_interval_start + interval_seconds,
-                        "interval_formatted": f"{self._format_time(current_interval_start)} - {self._format_time(current_interval_start + interval_seconds)}",
-                        "average_person_count": float(np.mean(person_counts)),
-                        "max_person_count": int(np.max(person_counts)),
-                        "min_person_count": int(np.min(person_counts)),
-                        "frames_in_interval": len(interval_detections)
-                    })
-                
-                # Start new interval
-                current_interval_start = int(timestamp // interval_seconds) * interval_seconds
-                interval_detections = []
-            
-            interval_detections.append(detection)
+        # Frames are in time order, so each interval is a contiguous run of buckets
+        buckets = (timestamps // interval_seconds).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        frames_in_interval = np.diff(np.r_[starts, frame_count])
+        averages = np.add.reduceat(person_counts, starts) / frames_in_interval
+        maxima = np.maximum.reduceat(person_counts, starts)
+        minima = np.minimum.reduceat(person_counts, starts)
         
-        # Add last interval
-        if interval_detections:
-            person_counts = [d.get("person_count", 0) for d in interval_detections]
+        timeline = []
+        for bucket, average, maximum, minimum, count in zip(
+            buckets[starts].tolist(), averages.tolist(), maxima.tolist(),
+            minima.tolist(), frames_in_interval.tolist()
+        ):
+            interval_start = bucket * interval_seconds
+            interval_end = interval_start + interval_seconds
             timeline.append({
-                "interval_start": current_interval_start,
-                "interval_end": current_interval_start + interval_seconds,
-                "interval_formatted": f"{self._format_time(current_interval_start)} - {self._format_time(current_interval_start + interval_seconds)}",
-                "average_person_count": float(np.mean(person_counts)),
-                "max_person_count": int(np.max(person_counts)),
-                "min_person_count": int(np.min(person_counts)),
-                "frames_in_interval": len(interval_detections)
+                "interval_start": interval_start,
+                "interval_end": interval_end,
+                "interval_formatted": f"{self._format_time(interval_start)} - {self._format_time(interval_end)}",
+                "average_person_count": average,
+                "max_person_count": maximum,
+                "min_person_count": minimum,
+                "frames_in_interval": count
             })
         
         return timeline
@@ -443,14 +643,7 @@ class VideoAnalysisService:
         max_count = stats.get("max_person_count", 0)
         
         # Determine crowd level
-        if avg_count < 5:
-            crowd_level = "Low"
-        elif avg_count < 15:
-            crowd_level = "Moderate"
-        elif avg_count < 25:
-            crowd_level = "High"
-        else:
-            crowd_level = "Very High"
+        crowd_level = _CROWD_LABELS[_crowd_level_index(avg_count)]
         
         # Find peak congestion period
         peak_period = "N/A"
@@ -458,7 +651,7 @@ class VideoAnalysisService:
             peak_period = peak_frames[0].get("timestamp_formatted", "N/A")
         
         # Calculate suggested staff
-        suggested_nurses = max(1, int(np.ceil(avg_count / 10)))
+        suggested_nurses = max(1, math.ceil(avg_count / 10))
         
         insights = {
             "crowd_level": crowd_level,
@@ -514,7 +707,7 @@ class VideoAnalysisService:
         Draw bounding boxes and information on frame.
         
         Args:
-            frame: Original frame
+            frame: Frame to annotate; drawn on in place, so pass a copy to keep the original
             detection: Detection results with bounding boxes
             frame_number: Current frame number
             timestamp: Formatted timestamp
@@ -522,7 +715,9 @@ class VideoAnalysisService:
         Returns:
             Annotated frame
         """
-        annotated = frame.copy()
+        height, width = frame.shape[:2]
+        use_umat = self.use_gpu_draw and cv2.ocl.haveOpenCL()
+        annotated = cv2.UMat(frame) if use_umat else frame
         person_count = detection.get("person_count", 0)
         detections_list = detection.get("detections", [])
         
@@ -539,7 +734,7 @@ class VideoAnalysisService:
                 
                 # Draw confidence label
                 label = f"Person {confidence:.2f}"
-                label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+                label_size = _label_size(label)
                 
                 # Draw label background
                 cv2.rectangle(
@@ -561,11 +756,15 @@ class VideoAnalysisService:
                     1
                 )
         
-        # Draw info panel at top
-        info_panel_height = 80
-        overlay = annotated.copy()
-        cv2.rectangle(overlay, (0, 0), (annotated.shape[1], info_panel_height), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.6, annotated, 0.4, 0, annotated)
+        # Draw info panel at top: a 60% black overlay, i.e. the strip darkened to 40%.
+        # Scaling in place gives the same pixels as blending a black rectangle
+        # (rows 0..INFO_PANEL_HEIGHT inclusive) without building the overlay
+        panel_rows = min(self.INFO_PANEL_HEIGHT + 1, height)
+        if use_umat:
+            panel = cv2.UMat(annotated, (0, panel_rows), (0, width))
+        else:
+            panel = annotated[:panel_rows]
+        cv2.convertScaleAbs(panel, panel, alpha=0.4)
         
         # Draw statistics
         cv2.putText(
@@ -589,30 +788,20 @@ class VideoAnalysisService:
         )
         
         # Draw crowd level indicator
-        if person_count < 5:
-            crowd_level = "Low"
-            color = (0, 255, 0)  # Green
-        elif person_count < 15:
-            crowd_level = "Moderate"
-            color = (0, 255, 255)  # Yellow
-        elif person_count < 25:
-            crowd_level = "High"
-            color = (0, 165, 255)  # Orange
-        else:
-            crowd_level = "Very High"
-            color = (0, 0, 255)  # Red
+        level = _crowd_level_index(person_count)
+        crowd_level, color = _CROWD_LABELS[level], _CROWD_COLORS[level]
         
         cv2.putText(
             annotated,
             f"Crowd Level: {crowd_level}",
-            (annotated.shape[1] - 300, 25),
+            (width - 300, 25),
             cv2.FONT_HERSHEY_SIMPLEX,
             0.7,
             color,
             2
         )
         
-        return annotated
+        return annotated.get() if use_umat else annotated
     
     def get_service_info(self) -> Dict:
         """Get information about the analysis service configuration."""
@@ -4,14 +4,136 @@ Handles video frame extraction and preprocessing using OpenCV.
 """
 
 import cv2
+import functools
 import logging
+import shutil
+import subprocess
+import tempfile
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from datetime import datetime
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# ffmpeg encoders in order of preference when VIDEO_ENCODER is "auto"
+ENCODER_PRESETS = {
+    "h264_nvenc": "p1",
+    "h264_qsv": "veryfast",
+    "libx264": "ultrafast",
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_encoders() -> frozenset:
+    """Names of the video encoders the local ffmpeg build supports (empty without ffmpeg)."""
+    if shutil.which("ffmpeg") is None:
+        return frozenset()
+    try:
+        output = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    # Encoder lines look like " V....D h264_nvenc  NVIDIA NVENC H.264 encoder"
+    return frozenset(line.split()[1] for line in output.splitlines() if line.startswith(" V"))
+
+
+class FFmpegVideoWriter:
+    """
+    Encodes BGR frames by piping raw video into an ffmpeg subprocess.
+    
+    Drop-in replacement for cv2.VideoWriter (write/release) that can use
+    hardware encoders (NVENC, Quick Sync) instead of OpenCV's software MPEG-4.
+    """
+    
+    def __init__(self, output_path: Path, fps: float, frame_size: Tuple[int, int], encoder: str):
+        width, height = frame_size
+        self.encoder = encoder
+        # A temp file rather than a pipe, so a chatty encoder can't fill the
+        # pipe buffer and block while frames are still being written
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "rawvideo", "-pix_fmt", "bgr24",
+                "-s", f"{width}x{height}", "-r", str(fps),
+                "-i", "-",
+                "-c:v", encoder, "-preset", ENCODER_PRESETS.get(encoder, "fast"),
+                "-pix_fmt", "yuv420p",
+                str(output_path)
+            ],
+            stdin=subprocess.PIPE,
+            stderr=self._stderr
+        )
+    
+    def write(self, frame: np.ndarray):
+        self.process.stdin.write(np.ascontiguousarray(frame).data)
+    
+    def release(self) -> bool:
+        """
+        Finish encoding and wait for ffmpeg to exit.
+        
+        Returns:
+            True if ffmpeg wrote the video successfully, False otherwise
+        """
+        if self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass  # ffmpeg already exited; the return code below says why
+            self.process.wait()
+            self._stderr.seek(0)
+            stderr = self._stderr.read().decode(errors="replace").strip()
+            self._stderr.close()
+            if self.process.returncode != 0:
+                logger.error(f"ffmpeg ({self.encoder}) exited with {self.process.returncode}: {stderr}")
+        return self.process.returncode == 0
+
+
+def create_video_writer(
+    output_path: Path,
+    fps: float,
+    frame_size: Tuple[int, int],
+    encoder: str = "auto"
+):
+    """
+    Open a writer for annotated video, preferring an ffmpeg hardware encoder.
+    
+    Args:
+        output_path: Output video file
+        fps: Output frame rate
+        frame_size: (width, height) of the frames
+        encoder: ffmpeg encoder name, "auto" to pick the best available, or
+            "opencv" to use cv2.VideoWriter
+            
+    Returns:
+        Object with write(frame) and release(); cv2.VideoWriter when ffmpeg is unavailable
+    """
+    available = _ffmpeg_encoders()
+    
+    if encoder == "auto":
+        # NVENC only helps with an NVIDIA GPU; Quick Sync is opt-in since many
+        # ffmpeg builds list it without the hardware to back it
+        candidates = ["libx264"]
+        try:
+            import torch
+            if torch.cuda.is_available():
+                candidates.insert(0, "h264_nvenc")
+        except ImportError:
+            pass
+        encoder = next((name for name in candidates if name in available), "opencv")
+    elif encoder != "opencv" and encoder not in available:
+        logger.warning(f"ffmpeg encoder {encoder} not available, falling back to OpenCV")
+        encoder = "opencv"
+    
+    if encoder == "opencv":
+        return cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+    
+    logger.info(f"Encoding annotated video with ffmpeg {encoder}")
+    return FFmpegVideoWriter(output_path, fps, frame_size, encoder)
+
 
 class VideoProcessor:
     """
@@ -28,7 +150,8 @@ class VideoProcessor:
         self,
         frame_sample_rate: int = 30,  # Process every Nth frame
         target_size: Optional[Tuple[int, int]] = None,  # Resize frames (width, height)
-        max_frames: Optional[int] = None  # Limit number of frames to process
+        max_frames: Optional[int] = None,  # Limit number of frames to process
+        inference_size: Optional[int] = None  # Detector input size (longest side)
     ):
         """
         Initialize the VideoProcessor.
@@ -37,10 +160,13 @@ class VideoProcessor:
             frame_sample_rate: Process every Nth frame (1 = every frame, 30 = 1 per second at 30fps)
             target_size: Optional target size for resizing frames (width, height)
             max_frames: Optional maximum number of frames to process
+            inference_size: If set, also emit a copy downscaled so its longest side fits
+                the detector input, resized exactly as YOLO's letterbox would
         """
         self.frame_sample_rate = frame_sample_rate
         self.target_size = target_size
         self.max_frames = max_frames
+        self.inference_size = inference_size
         
     def get_video_metadata(self, video_path: Path) -> Dict:
         """
@@ -103,19 +229,48 @@ class VideoProcessor:
         """
         Extract frames from video file.
         
+        Holds every sampled frame in memory; use iter_frames to stream long videos.
+        
         Args:
             video_path: Path to video file
             progress_callback: Optional callback function(current, total, frame_data)
             
         Returns:
-            List of dictionaries containing frame data:
-            [{
+            List of frame data dictionaries (see iter_frames)
+            
+        Raises:
+            ValueError: If video cannot be opened
+        """
+        return list(self.iter_frames(video_path, progress_callback))
+    
+    def iter_frames(
+        self,
+        video_path: Path,
+        progress_callback: Optional[callable] = None,
+        keep_full_frame: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Lazily decode and yield sampled frames from a video file.
+        
+        Args:
+            video_path: Path to video file
+            progress_callback: Optional callback function(current, total, frame_data)
+            keep_full_frame: When downscaling for inference, also keep the
+                full-size frame (needed only for annotation)
+            
+        Yields:
+            Dictionaries containing frame data:
+            {
                 "frame_number": int,
                 "timestamp": float (seconds),
                 "frame": numpy.ndarray (BGR image),
                 "original_size": (width, height),
-                "processed_size": (width, height)
-            }]
+                "processed_size": (width, height),
+                "inference_frame": numpy.ndarray (only if downscaled for inference),
+                "inference_scale": float (inference / processed size, if downscaled)
+            }
+            
+            Without keep_full_frame, "frame" is the downscaled inference frame.
             
         Raises:
             ValueError: If video cannot be opened
@@ -124,7 +279,6 @@ class VideoProcessor:
             raise ValueError(f"Video file not found: {video_path}")
         
         cap = cv2.VideoCapture(str(video_path))
-        frames_data = []
         
         try:
             if not cap.isOpened():
@@ -165,13 +319,17 @@ class VideoProcessor:
                         "processed_size": processed_size
                     }
                     
-                    frames_data.append(frame_data)
+                    if self.inference_size:
+                        self._add_inference_frame(frame_data, keep_full_frame)
+                    
                     processed_count += 1
                     
                     # Progress callback
                     if progress_callback:
                         progress_callback(processed_count, total_frames // self.frame_sample_rate, frame_data)
                     
+                    yield frame_data
+                    
                     # Check max frames limit
                     if self.max_frames and processed_count >= self.max_frames:
                         logger.info(f"Reached max frames limit: {self.max_frames}")
@@ -181,11 +339,29 @@ class VideoProcessor:
             
             logger.info(f"Frame extraction complete: {processed_count} frames extracted from {total_frames} total frames")
             
-            return frames_data
-            
         finally:
             cap.release()
     
+    def _add_inference_frame(self, frame_data: Dict, keep_full_frame: bool):
+        """Attach a detector-sized copy of the frame, matching YOLO's letterbox resize."""
+        frame = frame_data["frame"]
+        height, width = frame.shape[:2]
+        scale = self.inference_size / max(height, width)
+        if scale >= 1:
+            return
+        
+        # Same size and interpolation as LetterBox, so the detector doesn't resize again
+        inference_frame = cv2.resize(
+            frame,
+            (int(round(width * scale)), int(round(height * scale))),
+            interpolation=cv2.INTER_LINEAR
+        )
+        frame_data["inference_scale"] = scale
+        if keep_full_frame:
+            frame_data["inference_frame"] = inference_frame
+        else:
+            frame_data["frame"] = inference_frame
+    
     def extract_single_frame(
         self, 
         video_path: Path,
@@ -5,9 +5,14 @@ Handles cleanup of old uploads, expired sessions, and temporary files
 
 import os
 import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Optional
 import logging
 
 from app.config import settings
@@ -16,6 +21,145 @@ from app.database import get_supabase
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class CleanupResult:
+    """Outcome of an age-based file cleanup"""
+    files_removed: int
+    space_freed_mb: float
+    files: Optional[List[str]]  # None unless return_file_list was set
+    
+    @classmethod
+    def empty(cls, return_file_list: bool) -> "CleanupResult":
+        """Result for a cleanup that removed nothing"""
+        return cls(0, 0, [] if return_file_list else None)
+
+
+# Recent get_storage_stats results, keyed by (upload_dir, results_dir)
+_storage_stats_cache: Dict[tuple, tuple] = {}
+STORAGE_STATS_TTL = 30  # seconds
+
+# Threads for concurrent unlinks (I/O latency bound, so more than the CPU count)
+_DELETE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+# Module-level binding skips the os attribute lookup in the deletion loops
+_unlink = os.unlink
+
+
+# unlinkat() relative to an open directory fd skips re-resolving the directory per file
+_UNLINK_DIR_FD = _unlink in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+
+
+def _unlink_if_exists(path: str, dir_fd: int = None) -> bool:
+    """Delete a file, returning False if it was already gone"""
+    try:
+        _unlink(path, dir_fd=dir_fd)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _iter_rows(make_query: Callable[[], Any], page_size: int = 1000) -> Iterator[dict]:
+    """
+    Yield query rows one page at a time using .range()
+    
+    Args:
+        make_query: Builds a fresh, ordered query for each page
+        page_size: Rows fetched per request
+    """
+    offset = 0
+    while True:
+        rows = make_query().range(offset, offset + page_size - 1).execute().data
+        yield from rows
+        if len(rows) < page_size:
+            return
+        offset += page_size
+
+
+def _iter_dir_entries(directory: Path) -> Iterator[os.DirEntry]:
+    """
+    Iterate directory entries with os.scandir
+    
+    DirEntry caches the file type from readdir and its stat() result,
+    so each entry costs at most one stat syscall (Path.glob re-stats).
+    """
+    with os.scandir(directory) as entries:
+        yield from entries
+
+
+def _is_file_entry(entry: os.DirEntry) -> bool:
+    """
+    Whether cleanup should treat an entry as a file
+    
+    Symlinks are measured and removed as links, never via their target,
+    so neither check needs a stat call to resolve them.
+    """
+    return entry.is_file(follow_symlinks=False) or entry.is_symlink()
+
+
+def _scan_files(directory: Path) -> List[tuple]:
+    """
+    List the files in a directory in one scandir pass
+    
+    Returns:
+        (inode, path, name, size, mtime) per file, from a single lstat each
+    """
+    files = []
+    for entry in _iter_dir_entries(directory):
+        try:
+            if _is_file_entry(entry):
+                stat = entry.stat(follow_symlinks=False)
+                files.append((entry.inode(), entry.path, entry.name, stat.st_size, stat.st_mtime))
+        except FileNotFoundError:
+            continue  # Removed while scanning
+    return files
+
+
+def _delete_files(directory: Path, victims: List[tuple], parallel: bool) -> List[bool]:
+    """
+    Unlink scanned files in order, returning whether each one was removed
+    
+    Callers sort victims by inode first (scan tuples sort that way):
+    unlinking in inode order keeps directory and inode table updates local.
+    Where supported, files are unlinked by name relative to one open
+    directory fd instead of by full path.
+    """
+    if not victims:
+        return []
+    
+    dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY) if _UNLINK_DIR_FD else None
+    try:
+        if dir_fd is not None:
+            unlink = partial(_unlink_if_exists, dir_fd=dir_fd)
+            targets = [victim[2] for victim in victims]
+        else:
+            unlink = _unlink_if_exists
+            targets = [victim[1] for victim in victims]
+        
+        if parallel and len(targets) > 1:
+            # unlink is latency-bound, so concurrent calls overlap in the kernel
+            with ThreadPoolExecutor(max_workers=_DELETE_WORKERS) as executor:
+                return list(executor.map(unlink, targets))
+        return [unlink(target) for target in targets]
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+
+
+def _size_stats(files: List[tuple]) -> Dict[str, any]:
+    """Count and total size of scanned files"""
+    return {
+        "count": len(files),
+        "size_mb": round(sum(file[3] for file in files) / (1024 * 1024), 2)
+    }
+
+
+def _is_empty_dir(directory: Path) -> bool:
+    """Check for entries with a single readdir probe"""
+    with os.scandir(directory) as entries:
+        return next(entries, None) is None
+
+
 class CleanupManager:
     """
     Manager for cleaning up old files and data
@@ -30,92 +174,166 @@ class CleanupManager:
         """
         self.retention_days = retention_days
         self.cutoff_date = datetime.now() - timedelta(days=retention_days)
+        # Compared against st_mtime directly, without building a datetime per file
+        self.cutoff_ts = self.cutoff_date.timestamp()
+        # Resolved (and created) once instead of in every cleanup method
+        self.upload_dir = settings.get_upload_path()
+        self.results_dir = settings.get_results_path()
+    
+    def _summarize_removed(self, victims: List[tuple], removed: List[bool], description: str,
+                           return_file_list: bool) -> CleanupResult:
+        """
+        Build a cleanup summary and log it once
+        
+        Args:
+            victims: Scanned files that were deleted
+            removed: Per-victim unlink outcome from _delete_files
+            description: Log wording, e.g. "old uploads"
+            return_file_list: Collect the removed file names
+        
+        Returns:
+            Cleanup summary (see cleanup_old_uploads)
+        """
+        files = [] if return_file_list else None
+        files_removed = 0
+        total_size = 0
+        # Per-file lines only at DEBUG; INFO gets a single summary below
+        log_each = logger.isEnabledFor(logging.DEBUG)
+        for (_, _, name, size, _), was_removed in zip(victims, removed):
+            if was_removed:
+                files_removed += 1
+                total_size += size
+                if files is not None:
+                    files.append(name)
+                if log_each:
+                    logger.debug(f"Removed {name} ({description})")
+        
+        space_freed_mb = round(total_size / (1024 * 1024), 2)
+        if files_removed:
+            logger.info(f"Removed {files_removed} {description} totaling {space_freed_mb} MB")
+        
+        return CleanupResult(files_removed, space_freed_mb, files)
+    
+    def _find_valid_videos(self, names: List[str]) -> set:
+        """
+        Return which of the given video names have an analysis record
+        
+        Looks up only these names, not the whole table, a page at a time.
+        """
+        supabase = get_supabase()
+        query = lambda: supabase.table("ANALYSIS_RESULTS").select("video_name").in_(
+            "video_name", names
+        ).order("video_name")
+        return {item['video_name'] for item in _iter_rows(query)}
+    
+    def _remove_old_files(self, directory: Path, kind: str, parallel: bool,
+                          return_file_list: bool) -> CleanupResult:
+        """
+        Remove files in a directory older than the retention period
+        
+        Args:
+            directory: Directory to clean
+            kind: File kind for log messages ("upload", "result")
+            parallel: Issue the unlinks from a thread pool
+            return_file_list: Collect the removed file names
+        
+        Returns:
+            Cleanup summary (see cleanup_old_uploads)
+        """
+        victims = sorted(file for file in _scan_files(directory) if file[4] < self.cutoff_ts)
+        removed = _delete_files(directory, victims, parallel)
+        return self._summarize_removed(victims, removed, f"old {kind}s", return_file_list)
+    
+    def _scan_and_classify(self, directory: Path, kind: str, check_orphans: bool, parallel: bool,
+                           return_file_list: bool) -> tuple:
+        """
+        Age cleanup, orphan cleanup and size stats for one directory in a single scan
+        
+        Each file is classified once: older than the retention period, orphaned
+        (no analysis record, only when check_orphans is set) or kept.
+        
+        Returns:
+            (age summary, orphan summary or None, {"count", "size_mb"} of kept files)
+        """
+        orphan_result = {"uploads_orphaned": 0, "message": "Removed 0 orphaned files"} if check_orphans else None
+        if not directory.exists():
+            logger.warning(f"{kind.capitalize()} directory does not exist: {directory}")
+            return CleanupResult.empty(return_file_list), orphan_result, _size_stats([])
+        
+        files = sorted(_scan_files(directory))
+        old = [file for file in files if file[4] < self.cutoff_ts]
+        kept = [file for file in files if file[4] >= self.cutoff_ts]
+        
+        # Age cleanup never depends on the database
+        removed = _delete_files(directory, old, parallel)
+        age_result = self._summarize_removed(old, removed, f"old {kind}s", return_file_list)
+        
+        if check_orphans and kept:
+            try:
+                valid_videos = self._find_valid_videos([file[2] for file in kept])
+            except Exception as e:
+                # Unclassified files are left alone and counted as kept
+                logger.error(f"Error checking for orphaned {kind}s: {e}")
+                return age_result, {"error": str(e)}, _size_stats(kept)
+            
+            orphans = [file for file in kept if file[2] not in valid_videos]
+            kept = [file for file in kept if file[2] in valid_videos]
+            removed = _delete_files(directory, orphans, parallel)
+            count = self._summarize_removed(orphans, removed, f"orphaned {kind}s", False).files_removed
+            orphan_result = {"uploads_orphaned": count, "message": f"Removed {count} orphaned files"}
+        
+        return age_result, orphan_result, _size_stats(kept)
     
-    def cleanup_old_uploads(self) -> Dict[str, any]:
+    def cleanup_old_uploads(self, parallel: bool = True, return_file_list: bool = False) -> CleanupResult:
         """
         Remove uploaded video files older than retention period
         
+        Args:
+            parallel: Delete files concurrently from a thread pool
+            return_file_list: Include removed file names (None otherwise)
+        
         Returns:
-            {
-                "files_removed": 5,
-                "space_freed_mb": 245.6,
-                "files": ["video1.mp4", ...]
-            }
+            CleanupResult(files_removed=5, space_freed_mb=245.6, files=["video1.mp4", ...])
         """
-        upload_dir = settings.get_upload_path()
+        upload_dir = self.upload_dir
         
         if not upload_dir.exists():
             logger.warning(f"Upload directory does not exist: {upload_dir}")
-            return {"files_removed": 0, "space_freed_mb": 0, "files": []}
+            return CleanupResult.empty(return_file_list)
         
-        files_removed = []
-        total_size = 0
+        # Idle systems: one readdir probe instead of a full cleanup pass
+        if _is_empty_dir(upload_dir):
+            return CleanupResult.empty(return_file_list)
         
         try:
-            for file_path in upload_dir.glob("*"):
-                if file_path.is_file():
-                    # Check file age
-                    modified_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    
-                    if modified_time < self.cutoff_date:
-                        # Record size before deletion
-                        file_size = file_path.stat().st_size
-                        total_size += file_size
-                        
-                        # Delete file
-                        file_path.unlink()
-                        files_removed.append(file_path.name)
-                        logger.info(f"Removed old upload: {file_path.name}")
-            
-            return {
-                "files_removed": len(files_removed),
-                "space_freed_mb": round(total_size / (1024 * 1024), 2),
-                "files": files_removed
-            }
-            
+            return self._remove_old_files(upload_dir, "upload", parallel, return_file_list)
         except Exception as e:
             logger.error(f"Error during upload cleanup: {e}")
             raise
     
-    def cleanup_old_results(self) -> Dict[str, any]:
+    def cleanup_old_results(self, parallel: bool = True, return_file_list: bool = False) -> CleanupResult:
         """
         Remove exported result files older than retention period
         
+        Args:
+            parallel: Delete files concurrently from a thread pool
+            return_file_list: Include removed file names (None otherwise)
+        
         Returns:
-            {
-                "files_removed": 3,
-                "space_freed_mb": 1.2,
-                "files": ["result1.json", ...]
-            }
+            CleanupResult(files_removed=3, space_freed_mb=1.2, files=["result1.json", ...])
         """
-        results_dir = settings.get_results_path()
+        results_dir = self.results_dir
         
         if not results_dir.exists():
             logger.warning(f"Results directory does not exist: {results_dir}")
-            return {"files_removed": 0, "space_freed_mb": 0, "files": []}
+            return CleanupResult.empty(return_file_list)
         
-        files_removed = []
-        total_size = 0
+        # Idle systems: one readdir probe instead of a full cleanup pass
+        if _is_empty_dir(results_dir):
+            return CleanupResult.empty(return_file_list)
         
         try:
-            for file_path in results_dir.glob("*"):
-                if file_path.is_file():
-                    modified_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    
-                    if modified_time < self.cutoff_date:
-                        file_size = file_path.stat().st_size
-                        total_size += file_size
-                        
-                        file_path.unlink()
-                        files_removed.append(file_path.name)
-                        logger.info(f"Removed old result: {file_path.name}")
-            
-            return {
-                "files_removed": len(files_removed),
-                "space_freed_mb": round(total_size / (1024 * 1024), 2),
-                "files": files_removed
-            }
-            
+            return self._remove_old_files(results_dir, "result", parallel, return_file_list)
         except Exception as e:
             logger.error(f"Error during results cleanup: {e}")
             raise
@@ -131,27 +349,20 @@ class CleanupManager:
             }
         """
         try:
-            supabase = get_supabase()
-            
-            # Get all analysis results from database
-            response = supabase.table("ANALYSIS_RESULTS").select("video_id, video_name").execute()
-            
-            # Create set of valid video names
-            valid_videos = set()
-            for item in response.data:
-                if item.get('video_name'):
-                    valid_videos.add(item['video_name'])
-            
             # Check upload directory
-            upload_dir = settings.get_upload_path()
+            upload_dir = self.upload_dir
             uploads_removed = 0
             
             if upload_dir.exists():
-                for file_path in upload_dir.glob("*"):
-                    if file_path.is_file() and file_path.name not in valid_videos:
-                        file_path.unlink()
-                        uploads_removed += 1
-                        logger.info(f"Removed orphaned upload: {file_path.name}")
+                disk_files = _scan_files(upload_dir)
+                
+                if disk_files:
+                    valid_videos = self._find_valid_videos([file[2] for file in disk_files])
+                    orphans = sorted(file for file in disk_files if file[2] not in valid_videos)
+                    removed = _delete_files(upload_dir, orphans, parallel=False)
+                    uploads_removed = self._summarize_removed(
+                        orphans, removed, "orphaned uploads", return_file_list=False
+                    ).files_removed
             
             return {
                 "uploads_orphaned": uploads_removed,
@@ -181,14 +392,11 @@ class CleanupManager:
             
             supabase = get_supabase()
             
-            # Get old records
-            response = supabase.table("ANALYSIS_RESULTS").select("id").lt("created_at", cutoff_str).execute()
+            # Delete old records; the server reports how many rows went
+            response = supabase.table("ANALYSIS_RESULTS").delete(count="exact").lt("created_at", cutoff_str).execute()
             
-            old_records = len(response.data)
-            
-            # Delete old records
+            old_records = response.count or 0
             if old_records > 0:
-                supabase.table("ANALYSIS_RESULTS").delete().lt("created_at", cutoff_str).execute()
                 logger.info(f"Removed {old_records} old database records")
             
             return {
@@ -200,10 +408,13 @@ class CleanupManager:
             logger.error(f"Error during database cleanup: {e}")
             raise
     
-    def get_storage_stats(self) -> Dict[str, any]:
+    def get_storage_stats(self, max_age: float = 0) -> Dict[str, any]:
         """
         Get current storage statistics
         
+        Args:
+            max_age: Reuse stats computed within this many seconds (0 = always rescan)
+        
         Returns:
             {
                 "uploads": {"count": 10, "size_mb": 1024.5},
@@ -215,27 +426,52 @@ class CleanupManager:
             if not directory.exists():
                 return {"count": 0, "size_mb": 0}
             
-            files = list(directory.glob("*"))
-            total_size = sum(f.stat().st_size for f in files if f.is_file())
-            
-            return {
-                "count": len([f for f in files if f.is_file()]),
-                "size_mb": round(total_size / (1024 * 1024), 2)
-            }
+            # Single pass, one stat per file
+            return _size_stats(_scan_files(directory))
         
-        upload_stats = get_dir_stats(settings.get_upload_path())
-        results_stats = get_dir_stats(settings.get_results_path())
+        cache_key = (self.upload_dir, self.results_dir)
+        if max_age > 0:
+            cached = _storage_stats_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < max_age:
+                return cached[1]
         
-        return {
+        upload_stats = get_dir_stats(self.upload_dir)
+        results_stats = get_dir_stats(self.results_dir)
+        
+        stats = {
             "uploads": upload_stats,
             "results": results_stats,
             "total_size_mb": round(upload_stats["size_mb"] + results_stats["size_mb"], 2)
         }
+        # Every fresh scan refreshes the cache, including the one after cleanup_all
+        _storage_stats_cache[cache_key] = (time.monotonic(), stats)
+        return stats
     
-    def cleanup_all(self) -> Dict[str, any]:
+    def get_storage_stats_fast(self) -> Dict[str, any]:
+        """
+        Get filesystem usage for the upload volume without walking any directory
+        
+        Returns:
+            {
+                "total_mb": 512000.0,
+                "used_mb": 20480.5,
+                "free_mb": 491519.5
+            }
+        """
+        usage = shutil.disk_usage(self.upload_dir)
+        return {
+            "total_mb": round(usage.total / (1024 * 1024), 2),
+            "used_mb": round(usage.used / (1024 * 1024), 2),
+            "free_mb": round(usage.free / (1024 * 1024), 2)
+        }
+    
+    def cleanup_all(self, return_file_list: bool = False) -> Dict[str, any]:
         """
         Run all cleanup operations
         
+        Args:
+            return_file_list: Include removed file names in the summary
+        
         Returns:
             Summary of all cleanup operations
         """
@@ -247,29 +483,46 @@ class CleanupManager:
             "operations": {}
         }
         
-        # Cleanup old uploads
+        # One scan per directory covers age cleanup, orphan cleanup and the
+        # final size stats; the two directories are cleaned side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            uploads = executor.submit(
+                self._scan_and_classify, self.upload_dir, "upload", True, True, return_file_list
+            )
+            results_phase = executor.submit(
+                self._scan_and_classify, self.results_dir, "result", False, True, return_file_list
+            )
+        
+        storage_after = {}
         try:
-            results["operations"]["uploads"] = self.cleanup_old_uploads()
+            age_result, orphan_result, storage_after["uploads"] = uploads.result()
+            results["operations"]["uploads"] = age_result
         except Exception as e:
+            logger.error(f"Error during upload cleanup: {e}")
             results["operations"]["uploads"] = {"error": str(e)}
+            orphan_result = {"error": str(e)}
         
-        # Cleanup old results
         try:
-            results["operations"]["results"] = self.cleanup_old_results()
+            age_result, _, storage_after["results"] = results_phase.result()
+            results["operations"]["results"] = age_result
         except Exception as e:
+            logger.error(f"Error during results cleanup: {e}")
             results["operations"]["results"] = {"error": str(e)}
         
-        # Cleanup orphaned files
-        try:
-            results["operations"]["orphaned"] = self.cleanup_orphaned_files()
-        except Exception as e:
-            results["operations"]["orphaned"] = {"error": str(e)}
+        results["operations"]["orphaned"] = orphan_result
         
-        # Get final storage stats
-        try:
-            results["storage_after"] = self.get_storage_stats()
-        except Exception as e:
-            results["storage_after"] = {"error": str(e)}
+        # Storage after cleanup is what each scan kept; rescan only if a phase failed
+        if len(storage_after) == 2:
+            storage_after["total_size_mb"] = round(
+                storage_after["uploads"]["size_mb"] + storage_after["results"]["size_mb"], 2
+            )
+            _storage_stats_cache[(self.upload_dir, self.results_dir)] = (time.monotonic(), storage_after)
+            results["storage_after"] = storage_after
+        else:
+            try:
+                results["storage_after"] = self.get_storage_stats()
+            except Exception as e:
+                results["storage_after"] = {"error": str(e)}
         
         results["completed_at"] = datetime.now().isoformat()
         
@@ -279,29 +532,67 @@ class CleanupManager:
 
 # Convenience functions
 
-def cleanup_old_files(retention_days: int = 30) -> Dict[str, any]:
+def cleanup_old_files(retention_days: int = 30, return_file_list: bool = False) -> Dict[str, any]:
     """
     Quick cleanup of old files
     
     Args:
         retention_days: Days to retain files
+        return_file_list: Include removed file names in the summary
     
     Returns:
         Cleanup summary
     """
     manager = CleanupManager(retention_days=retention_days)
-    return manager.cleanup_all()
+    return manager.cleanup_all(return_file_list=return_file_list)
 
 
-def get_storage_info() -> Dict[str, any]:
+def get_storage_info(fast: bool = False) -> Dict[str, any]:
     """
     Get current storage information
     
+    Args:
+        fast: Return filesystem usage instead of per-directory totals
+    
     Returns:
-        Storage statistics
+        Storage statistics (per-directory totals are cached for STORAGE_STATS_TTL seconds)
     """
     manager = CleanupManager()
-    return manager.get_storage_stats()
+    if fast:
+        return manager.get_storage_stats_fast()
+    return manager.get_storage_stats(max_age=STORAGE_STATS_TTL)
+
+
+# Background cleanup runs, keyed by task id (oldest dropped past the limit)
+_cleanup_tasks: Dict[str, Dict[str, any]] = {}
+_MAX_CLEANUP_TASKS = 100
+
+
+def _run_cleanup_task(task_id: str, retention_days: int, return_file_list: bool) -> None:
+    """
+    Run a queued cleanup and record its outcome for polling
+    
+    Args:
+        task_id: Key in the task registry
+        retention_days: Days to retain files
+        return_file_list: Include removed file names in the summary
+    """
+    task = _cleanup_tasks[task_id]
+    task["status"] = "running"
+    try:
+        result = cleanup_old_files(retention_days=retention_days, return_file_list=return_file_list)
+        # CleanupResult entries become plain dicts only at the API boundary
+        result["operations"] = {
+            name: asdict(operation) if isinstance(operation, CleanupResult) else operation
+            for name, operation in result["operations"].items()
+        }
+        task["result"] = result
+        task["status"] = "completed"
+    except Exception as e:
+        logger.error(f"Background cleanup {task_id} failed: {e}")
+        task["error"] = str(e)
+        task["status"] = "failed"
+    task["completed_at"] = datetime.now().isoformat()
 
 
 # Add cleanup endpoint to results router
@@ -313,11 +604,13 @@ def setup_cleanup_endpoints(router):
         from app.utils.cleanup import setup_cleanup_endpoints
         setup_cleanup_endpoints(router)
     """
-    from fastapi import HTTPException, Query
+    from fastapi import BackgroundTasks, HTTPException, Query
     
     @router.post("/admin/cleanup")
     async def trigger_cleanup(
-        retention_days: int = Query(30, description="Days to retain files")
+        background_tasks: BackgroundTasks,
+        retention_days: int = Query(30, description="Days to retain files"),
+        return_file_list: bool = Query(False, description="Include removed file names")
     ):
         """
         Manually trigger cleanup of old files
@@ -327,23 +620,49 @@ def setup_cleanup_endpoints(router):
         - Old exported results
         - Orphaned files
         
+        The cleanup runs in the background; poll
+        GET /admin/cleanup/{task_id} for its summary.
+        
         Args:
             retention_days: Files older than this will be removed
+            return_file_list: List every removed file in the summary
         
         Returns:
-            Cleanup summary
+            Task id and status
         """
-        try:
-            result = cleanup_old_files(retention_days=retention_days)
-            return result
-        except Exception as e:
+        task_id = uuid.uuid4().hex
+        _cleanup_tasks[task_id] = {
+            "task_id": task_id,
+            "status": "queued",
+            "started_at": datetime.now().isoformat()
+        }
+        while len(_cleanup_tasks) > _MAX_CLEANUP_TASKS:
+            _cleanup_tasks.pop(next(iter(_cleanup_tasks)))
+        
+        background_tasks.add_task(_run_cleanup_task, task_id, retention_days, return_file_list)
+        return {"task_id": task_id, "status": "queued"}
+    
+    @router.get("/admin/cleanup/{task_id}")
+    async def get_cleanup_task(task_id: str):
+        """
+        Get the status of a background cleanup
+        
+        Returns:
+            Task status, with the cleanup summary once completed
+            or the error message if it failed
+        """
+        task = _cleanup_tasks.get(task_id)
+        if task is None:
             raise HTTPException(
-                status_code=500,
-                detail=f"Cleanup failed: {str(e)}"
+                status_code=404,
+                detail=f"Cleanup task not found: {task_id}"
             )
+        return task
     
     @router.get("/admin/storage")
-    async def get_storage():
+    async def get_storage(
+        fast: bool = Query(False, description="Return filesystem usage only")
+    ):
         """
         Get current storage statistics
         
@@ -351,9 +670,11 @@ def setup_cleanup_endpoints(router):
         - Uploads directory
         - Results directory
         - Total size
+        
+        With fast=true, returns total/used/free space of the upload volume instead.
         """
         try:
-            return get_storage_info()
+            return get_storage_info(fast=fast)
         except Exception as e:
             raise HTTPException(
                 status_code=500,
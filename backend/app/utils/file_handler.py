@@ -170,11 +170,15 @@ class FileHandler:
         current_time = datetime.now().timestamp()
         cutoff_time = current_time - (days * 24 * 60 * 60)
         
-        for file_path in self.upload_dir.glob('*'):
-            if file_path.is_file():
-                file_time = file_path.stat().st_mtime
-                if file_time < cutoff_time:
-                    file_path.unlink()
+        # DirEntry caches the file type and path string, so each file
+        # costs one stat and a direct os.unlink call. Symlinks are aged and
+        # removed as links, never followed, matching CleanupManager.
+        with os.scandir(self.upload_dir) as entries:
+            for entry in entries:
+                if not (entry.is_file(follow_symlinks=False) or entry.is_symlink()):
+                    continue
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                    os.unlink(entry.path)
                     deleted_count += 1
         
         return deleted_count
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+INT8 Quantization Tool - YOLOv8 person detector
+Builds an INT8 OpenVINO IR of the detector with NNCF post-training quantization,
+calibrated on frames sampled from a representative hospital video.
+
+Usage:
+    python quantize_yolo.py path/to/video.mp4 [--model yolov8n.pt] [--frames 300]
+
+Then run the API with:
+    DETECTOR_BACKEND=openvino
+    DETECTOR_MODEL_PATH=models/yolov8n_int8_openvino_model
+
+Requires: pip install openvino nncf
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from app.services.person_detector import PersonDetector
+from app.services.video_processor import VideoProcessor
+
+IMAGE_SIZE = 640
+COUNT_BATCH_SIZE = 16
+
+
+def sample_calibration_frames(video_path: Path, num_frames: int) -> list:
+    """Sample about num_frames frames spread evenly across the video"""
+    metadata = VideoProcessor().get_video_metadata(video_path)
+    sample_rate = max(1, metadata["total_frames"] // num_frames)
+
+    processor = VideoProcessor(frame_sample_rate=sample_rate, max_frames=num_frames)
+    return [frame_data["frame"] for frame_data in processor.extract_frames(video_path)]
+
+
+def preprocess(frame: np.ndarray) -> np.ndarray:
+    """Letterbox a BGR frame into the (1, 3, 640, 640) float tensor the IR expects"""
+    from ultralytics.data.augment import LetterBox
+
+    image = LetterBox((IMAGE_SIZE, IMAGE_SIZE), auto=False)(image=frame)
+    image = image[..., ::-1].transpose(2, 0, 1)  # BGR HWC -> RGB CHW
+    return np.ascontiguousarray(image, dtype=np.float32)[None] / 255.0
+
+
+def person_counts(detector: PersonDetector, frames: list) -> np.ndarray:
+    """Per-frame person counts from a detector"""
+    counts = []
+    # Fixed-size slices keep the predictor batch (and its input tensors) small
+    for start in range(0, len(frames), COUNT_BATCH_SIZE):
+        results = detector.detect_batch(frames[start:start + COUNT_BATCH_SIZE], return_boxes=False)
+        counts.extend(result["person_count"] for result in results)
+    return np.array(counts, dtype=float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the YOLOv8 person detector to INT8")
+    parser.add_argument("video", type=Path, help="Representative video for calibration")
+    parser.add_argument("--model", default="yolov8n.pt", help="YOLOv8 weights to quantize")
+    parser.add_argument("--frames", type=int, default=300, help="Number of calibration frames")
+    args = parser.parse_args()
+
+    try:
+        import nncf
+        import openvino as ov
+    except ImportError:
+        print("❌ OpenVINO and NNCF are required: pip install openvino nncf")
+        return 1
+
+    print(f"Sampling {args.frames} calibration frames from {args.video.name}...")
+    frames = sample_calibration_frames(args.video, args.frames)
+    print(f"✅ {len(frames)} frames sampled")
+
+    # The FP32 IR is exported (or reused) by the detector itself
+    fp32_detector = PersonDetector(model_name=args.model, backend="openvino")
+    weights = Path(args.model)
+    fp32_dir = weights.with_name(f"{weights.stem}_openvino_model")
+    int8_dir = Path("models") / f"{weights.stem}_int8_openvino_model"
+    int8_dir.mkdir(parents=True, exist_ok=True)
+
+    print("Quantizing to INT8...")
+    fp32_model = ov.Core().read_model(str(next(fp32_dir.glob("*.xml"))))
+    # Keep the box decoding head in float; quantizing it costs most of the accuracy
+    ignored_scope = nncf.IgnoredScope(types=["Multiply", "Subtract", "Sigmoid"])
+    int8_model = nncf.quantize(
+        fp32_model,
+        nncf.Dataset(frames, preprocess),
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=len(frames),
+        ignored_scope=ignored_scope
+    )
+    ov.save_model(int8_model, str(int8_dir / "yolo_int8.xml"))
+    # Ultralytics reads names, stride and image size from the export metadata
+    shutil.copy(fp32_dir / "metadata.yaml", int8_dir / "metadata.yaml")
+    print(f"✅ INT8 model saved: {int8_dir}")
+
+    print("Measuring accuracy delta on the calibration frames...")
+    int8_detector = PersonDetector(model_name=args.model, backend="openvino", model_path=int8_dir)
+    fp32_counts = person_counts(fp32_detector, frames)
+    int8_counts = person_counts(int8_detector, frames)
+    report = {
+        "source_model": weights.name,
+        "frames": len(frames),
+        "fp32_avg_count": float(fp32_counts.mean()),
+        "int8_avg_count": float(int8_counts.mean()),
+        "mean_count_delta": float(np.abs(int8_counts - fp32_counts).mean())
+    }
+    (int8_dir / "quantization.json").write_text(json.dumps(report, indent=2))
+
+    print(f"  • FP32 avg people: {report['fp32_avg_count']:.2f}")
+    print(f"  • INT8 avg people: {report['int8_avg_count']:.2f}")
+    print(f"  • Mean per-frame count delta: {report['mean_count_delta']:.3f}")
+    print()
+    print("Enable with:")
+    print("  DETECTOR_BACKEND=openvino")
+    print(f"  DETECTOR_MODEL_PATH={int8_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Tests for analysis API endpoints.
+"""
+
+import time
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import analysis
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tracked_analysis(monkeypatch):
+    """Register an in-process analysis in the progress table."""
+    monkeypatch.setattr(analysis, "LONG_POLL_INTERVAL", 0.01)
+    analysis_id = "test-analysis"
+    analysis.analysis_progress[analysis_id] = {
+        "status": "processing",
+        "progress": 40,
+        "message": "Detecting people..."
+    }
+    yield analysis_id
+    analysis.analysis_progress.pop(analysis_id, None)
+
+
+def test_status_returns_current_progress(tracked_analysis):
+    """Test a plain status request returns immediately."""
+    response = client.get(f"/api/analyze/status/{tracked_analysis}")
+
+    assert response.status_code == 200
+    assert response.json()["progress"] == 40
+
+
+def test_status_long_poll_times_out(tracked_analysis):
+    """Test a long-poll returns the current progress once the timeout expires."""
+    start = time.monotonic()
+    response = client.get(f"/api/analyze/status/{tracked_analysis}", params={"wait": True, "timeout": 0.2})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "processing"
+    assert time.monotonic() - start >= 0.2
+
+
+def test_status_long_poll_returns_on_failure(tracked_analysis):
+    """Test a long-poll returns as soon as the analysis finishes."""
+    analysis.analysis_progress[tracked_analysis] = {
+        "status": "failed",
+        "progress": 0,
+        "message": "Decode error"
+    }
+
+    start = time.monotonic()
+    response = client.get(f"/api/analyze/status/{tracked_analysis}", params={"wait": True, "timeout": 5})
+
+    assert response.json()["status"] == "failed"
+    assert time.monotonic() - start < 1
+
+
+def test_start_analysis_idempotency_key(tracked_analysis, monkeypatch):
+    """Test a repeated Idempotency-Key returns the analysis it started."""
+    monkeypatch.setitem(analysis.analysis_by_idempotency_key, "key-1", ("video-1", tracked_analysis))
+
+    response = client.post(
+        "/api/analyze/video-1",
+        json={"upload_id": "video-1"},
+        headers={"Idempotency-Key": "key-1"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["analysis_id"] == tracked_analysis
+    assert response.json()["status"] == "processing"
+    assert response.json()["video_id"] == "video-1"
+
+
+def test_start_analysis_idempotency_key_other_video(tracked_analysis, monkeypatch):
+    """Test reusing an Idempotency-Key for a different video is rejected."""
+    monkeypatch.setitem(analysis.analysis_by_idempotency_key, "key-1", ("video-1", tracked_analysis))
+
+    response = client.post(
+        "/api/analyze/video-2",
+        json={"upload_id": "video-2"},
+        headers={"Idempotency-Key": "key-1"}
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,43 @@
+"""
+Tests for the batch API endpoint.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import analysis
+
+client = TestClient(app)
+
+
+def test_batch_runs_requests_in_order():
+    """Test sub-requests are served in-process and returned in order."""
+    analysis.analysis_progress["batch-a"] = {"status": "processing", "progress": 10, "message": "a"}
+    analysis.analysis_progress["batch-b"] = {"status": "processing", "progress": 20, "message": "b"}
+    try:
+        response = client.post("/api/batch", json={"requests": [
+            {"method": "GET", "path": "/api/analyze/status/batch-a"},
+            {"path": "/api/analyze/status/batch-b"},
+        ]})
+    finally:
+        analysis.analysis_progress.pop("batch-a")
+        analysis.analysis_progress.pop("batch-b")
+
+    assert response.status_code == 200
+    responses = response.json()["responses"]
+    assert [item["status"] for item in responses] == [200, 200]
+    assert [item["body"]["progress"] for item in responses] == [10, 20]
+
+
+def test_batch_rejects_unsupported_requests():
+    """Test only GET requests to API paths are accepted."""
+    invalid = [
+        {"method": "POST", "path": "/api/upload"},
+        {"path": "/health"},
+        {"path": "/api/batch"},
+    ]
+    for item in invalid:
+        response = client.post("/api/batch", json={"requests": [item]})
+        assert response.status_code == 400
+
+    assert client.post("/api/batch", json={"requests": []}).status_code == 422
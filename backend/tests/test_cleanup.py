@@ -0,0 +1,365 @@
+"""
+Tests for file cleanup utilities.
+"""
+
+import os
+import time
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils import cleanup
+from app.utils.cleanup import CleanupManager, CleanupResult, setup_cleanup_endpoints
+
+
+class FakeTable:
+    """Minimal stand-in for the database client's chained table queries."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def select(self, fields="*", count=None):
+        self.queries.append(("select", fields))
+        self._fields = [field.strip() for field in fields.split(",")]
+        self._filter = bool
+        self._order = None
+        self._range = None
+        return self
+
+    def order(self, column, desc=False):
+        self.queries.append(("order", column))
+        self._order = column
+        return self
+
+    def range(self, start, end):
+        self.queries.append(("range", start, end))
+        self._range = (start, end)
+        return self
+
+    def delete(self, count=None):
+        self.queries.append(("delete", count))
+        self._delete = True
+        return self
+
+    def lt(self, column, value):
+        self.queries.append(("lt", column, value))
+        self._filter = lambda row: row[column] < value
+        return self
+
+    def in_(self, column, values):
+        self.queries.append(("in_", column, sorted(values)))
+        self._filter = lambda row: row[column] in values
+        return self
+
+    def execute(self):
+        if getattr(self, "_delete", False):
+            removed = [row for row in self.rows if self._filter(row)]
+            self.rows = [row for row in self.rows if not self._filter(row)]
+            return type("Response", (), {"data": [], "count": len(removed)})()
+        rows = [row for row in self.rows if self._filter(row)]
+        if self._order:
+            rows.sort(key=lambda row: row[self._order])
+        if self._range:
+            rows = rows[self._range[0]:self._range[1] + 1]
+        data = [{field: row.get(field) for field in self._fields} for row in rows]
+        return type("Response", (), {"data": data})()
+
+
+@pytest.fixture
+def analysis_table(monkeypatch):
+    """Serve ANALYSIS_RESULTS from an in-memory list of rows."""
+    table = FakeTable([])
+    client = type("Client", (), {"table": lambda self, name: table})()
+    monkeypatch.setattr(cleanup, "get_supabase", lambda: client)
+    return table
+
+
+@pytest.fixture
+def storage_dirs(tmp_path, monkeypatch):
+    """Point the upload and results directories at temporary folders."""
+    upload_dir = tmp_path / "uploads"
+    results_dir = tmp_path / "results"
+    upload_dir.mkdir()
+    results_dir.mkdir()
+    monkeypatch.setattr(type(settings), "get_upload_path", lambda self: upload_dir)
+    monkeypatch.setattr(type(settings), "get_results_path", lambda self: results_dir)
+    return upload_dir, results_dir
+
+
+def make_file(directory, name, size=1024, age_days=0):
+    """Create a file of the given size with its mtime set age_days in the past."""
+    path = directory / name
+    path.write_bytes(b"\0" * size)
+    mtime = time.time() - age_days * 86400
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_cleanup_old_uploads(storage_dirs):
+    """Test only uploads older than the retention period are removed."""
+    upload_dir, _ = storage_dirs
+    make_file(upload_dir, "old.mp4", size=2 * 1024 * 1024, age_days=40)
+    make_file(upload_dir, "new.mp4", age_days=1)
+    (upload_dir / "subdir").mkdir()
+
+    result = CleanupManager(retention_days=30).cleanup_old_uploads(return_file_list=True)
+
+    assert result.files_removed == 1
+    assert result.space_freed_mb == 2.0
+    assert result.files == ["old.mp4"]
+    assert sorted(p.name for p in upload_dir.iterdir()) == ["new.mp4", "subdir"]
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_cleanup_old_uploads_many(storage_dirs, parallel):
+    """Test bulk deletion reports every removed file, in or out of the thread pool."""
+    upload_dir, _ = storage_dirs
+    for i in range(50):
+        make_file(upload_dir, f"old_{i:02d}.mp4", age_days=60)
+    make_file(upload_dir, "keep.mp4")
+
+    result = CleanupManager(retention_days=30).cleanup_old_uploads(parallel=parallel, return_file_list=True)
+
+    assert result.files_removed == 50
+    assert sorted(result.files) == [f"old_{i:02d}.mp4" for i in range(50)]
+    assert [p.name for p in upload_dir.iterdir()] == ["keep.mp4"]
+
+
+@pytest.mark.skipif(not cleanup._UNLINK_DIR_FD, reason="unlinkat with dir_fd unsupported")
+def test_delete_files_relative_to_dir_fd(storage_dirs, monkeypatch):
+    """Test files are unlinked by name against an open directory fd."""
+    upload_dir, _ = storage_dirs
+    for name in ("a.mp4", "b.mp4"):
+        make_file(upload_dir, name, age_days=40)
+    calls = []
+    unlink = cleanup._unlink
+
+    def recording_unlink(path, dir_fd=None):
+        calls.append((path, dir_fd))
+        unlink(path, dir_fd=dir_fd)
+
+    monkeypatch.setattr(cleanup, "_unlink", recording_unlink)
+
+    result = CleanupManager(retention_days=30).cleanup_old_uploads(parallel=False)
+
+    assert result.files_removed == 2
+    assert sorted(path for path, _ in calls) == ["a.mp4", "b.mp4"]
+    assert all(dir_fd is not None for _, dir_fd in calls)
+
+
+def test_cleanup_old_uploads_symlink(storage_dirs, tmp_path):
+    """Test an expired symlink is removed by its own age, leaving the target alone."""
+    upload_dir, _ = storage_dirs
+    target = make_file(tmp_path, "target.mp4")
+    link = upload_dir / "link.mp4"
+    link.symlink_to(target)
+    mtime = time.time() - 40 * 86400
+    os.utime(link, (mtime, mtime), follow_symlinks=False)
+
+    result = CleanupManager(retention_days=30).cleanup_old_uploads(return_file_list=True)
+
+    assert result.files == ["link.mp4"]
+    assert not os.path.lexists(link)
+    assert target.exists()
+
+
+def test_cleanup_old_uploads_count_only(storage_dirs):
+    """Test file names are only collected on request."""
+    upload_dir, _ = storage_dirs
+    make_file(upload_dir, "old.mp4", age_days=40)
+
+    result = CleanupManager(retention_days=30).cleanup_old_uploads()
+
+    assert result.files_removed == 1
+    assert result.files is None
+
+
+def test_cleanup_old_results_empty_dir(storage_dirs, monkeypatch):
+    """Test an empty directory returns before any cleanup pass."""
+    monkeypatch.setattr(CleanupManager, "_remove_old_files", None)
+
+    result = CleanupManager().cleanup_old_results(return_file_list=True)
+
+    assert result == CleanupResult(0, 0, [])
+
+
+def test_cleanup_old_results(storage_dirs):
+    """Test old exported results are removed."""
+    _, results_dir = storage_dirs
+    make_file(results_dir, "old.json", age_days=31)
+    make_file(results_dir, "new.json")
+
+    result = CleanupManager(retention_days=30).cleanup_old_results(return_file_list=True)
+
+    assert result.files == ["old.json"]
+    assert [p.name for p in results_dir.iterdir()] == ["new.json"]
+
+
+def test_cleanup_orphaned_files(storage_dirs, analysis_table):
+    """Test uploads without a database record are removed."""
+    upload_dir, _ = storage_dirs
+    analysis_table.rows = [
+        {"video_id": 1, "video_name": "known.mp4"},
+        {"video_id": 2, "video_name": None},
+    ]
+    make_file(upload_dir, "known.mp4")
+    make_file(upload_dir, "orphan.mp4")
+
+    result = CleanupManager().cleanup_orphaned_files()
+
+    assert result["uploads_orphaned"] == 1
+    assert [p.name for p in upload_dir.iterdir()] == ["known.mp4"]
+    assert analysis_table.queries == [
+        ("select", "video_name"),
+        ("in_", "video_name", ["known.mp4", "orphan.mp4"]),
+        ("order", "video_name"),
+        ("range", 0, 999),
+    ]
+
+
+def test_iter_rows_pages(analysis_table):
+    """Test rows are fetched page by page until a short page."""
+    analysis_table.rows = [{"video_name": f"{i}.mp4"} for i in range(5)]
+
+    query = lambda: analysis_table.select("video_name").order("video_name")
+    rows = list(cleanup._iter_rows(query, page_size=2))
+
+    assert [row["video_name"] for row in rows] == [f"{i}.mp4" for i in range(5)]
+    ranges = [q[1:] for q in analysis_table.queries if q[0] == "range"]
+    assert ranges == [(0, 1), (2, 3), (4, 5)]
+
+
+def test_cleanup_orphaned_files_empty_dir(storage_dirs, analysis_table):
+    """Test an empty upload directory skips the database lookup."""
+    result = CleanupManager().cleanup_orphaned_files()
+
+    assert result["uploads_orphaned"] == 0
+    assert analysis_table.queries == []
+
+
+def test_cleanup_old_database_records(analysis_table):
+    """Test old records are deleted in a single counted query."""
+    analysis_table.rows = [
+        {"id": 1, "created_at": "2000-01-01"},
+        {"id": 2, "created_at": "2000-06-01"},
+        {"id": 3, "created_at": "2999-01-01"},
+    ]
+
+    result = CleanupManager().cleanup_old_database_records(days=90)
+
+    assert result["records_removed"] == 2
+    assert [row["id"] for row in analysis_table.rows] == [3]
+    assert [query[0] for query in analysis_table.queries] == ["delete", "lt"]
+    assert analysis_table.queries[0] == ("delete", "exact")
+
+
+def test_cleanup_all(storage_dirs, analysis_table):
+    """Test all phases run and storage stats reflect the cleaned state."""
+    upload_dir, results_dir = storage_dirs
+    analysis_table.rows = [{"video_name": "known.mp4"}, {"video_name": "stale.mp4"}]
+    make_file(upload_dir, "known.mp4", size=1024 * 1024)
+    make_file(upload_dir, "stale.mp4", age_days=40)
+    make_file(upload_dir, "orphan.mp4")
+    make_file(results_dir, "old.json", age_days=40)
+
+    result = CleanupManager(retention_days=30).cleanup_all(return_file_list=True)
+
+    assert list(result["operations"]) == ["uploads", "results", "orphaned"]
+    assert result["operations"]["uploads"].files == ["stale.mp4"]
+    assert result["operations"]["results"].files == ["old.json"]
+    assert "error" not in result["operations"]["orphaned"]
+    assert result["storage_after"]["uploads"] == {"count": 1, "size_mb": 1.0}
+    assert result["storage_after"]["results"]["count"] == 0
+
+
+def test_cleanup_all_removes_expired_files_when_database_fails(storage_dirs, monkeypatch):
+    """Test a failing orphan lookup still lets age-based cleanup run."""
+    upload_dir, _ = storage_dirs
+    make_file(upload_dir, "old.mp4", age_days=40)
+    make_file(upload_dir, "fresh.mp4", size=1024 * 1024)
+
+    def db_down():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(cleanup, "get_supabase", db_down)
+
+    result = CleanupManager(retention_days=30).cleanup_all(return_file_list=True)
+
+    assert not (upload_dir / "old.mp4").exists()
+    assert (upload_dir / "fresh.mp4").exists()
+    assert result["operations"]["uploads"].files == ["old.mp4"]
+    assert result["operations"]["orphaned"] == {"error": "db down"}
+    assert result["storage_after"]["uploads"] == {"count": 1, "size_mb": 1.0}
+
+
+def test_cleanup_all_scans_each_directory_once(storage_dirs, analysis_table, monkeypatch):
+    """Test cleanup_all classifies and sizes files from a single scan per directory."""
+    upload_dir, _ = storage_dirs
+    make_file(upload_dir, "orphan.mp4")
+    scanned = []
+    scan_files = cleanup._scan_files
+    monkeypatch.setattr(cleanup, "_scan_files", lambda d: scanned.append(d.name) or scan_files(d))
+
+    result = CleanupManager().cleanup_all()
+
+    assert sorted(scanned) == ["results", "uploads"]
+    assert result["operations"]["orphaned"]["uploads_orphaned"] == 1
+    assert result["storage_after"]["uploads"]["count"] == 0
+
+
+def test_get_storage_stats(storage_dirs):
+    """Test storage statistics count files and sizes per directory."""
+    upload_dir, results_dir = storage_dirs
+    make_file(upload_dir, "a.mp4", size=1024 * 1024)
+    make_file(upload_dir, "b.mp4", size=1024 * 1024)
+    make_file(results_dir, "a.json", size=512 * 1024)
+
+    stats = CleanupManager().get_storage_stats()
+
+    assert stats["uploads"] == {"count": 2, "size_mb": 2.0}
+    assert stats["results"] == {"count": 1, "size_mb": 0.5}
+    assert stats["total_size_mb"] == 2.5
+
+
+def test_get_storage_stats_cached(storage_dirs):
+    """Test repeated stats within max_age reuse the last scan."""
+    upload_dir, _ = storage_dirs
+    make_file(upload_dir, "a.mp4")
+    manager = CleanupManager()
+
+    first = manager.get_storage_stats()
+    make_file(upload_dir, "b.mp4")
+
+    assert manager.get_storage_stats(max_age=30) is first
+    assert manager.get_storage_stats()["uploads"]["count"] == 2
+
+
+def test_get_storage_stats_fast(storage_dirs):
+    """Test fast stats report filesystem usage."""
+    stats = CleanupManager().get_storage_stats_fast()
+
+    assert stats["total_mb"] >= stats["free_mb"] > 0
+
+
+def test_cleanup_endpoint_runs_in_background(storage_dirs, analysis_table):
+    """Test the cleanup endpoint queues a task whose summary can be polled."""
+    upload_dir, _ = storage_dirs
+    analysis_table.rows = [{"video_name": "old.mp4"}]
+    make_file(upload_dir, "old.mp4", age_days=40)
+    router = APIRouter()
+    setup_cleanup_endpoints(router)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    response = client.post("/admin/cleanup", params={"return_file_list": True})
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+
+    # TestClient runs background tasks before returning the response
+    task = client.get(f"/admin/cleanup/{response.json()['task_id']}").json()
+    assert task["status"] == "completed"
+    assert task["result"]["operations"]["uploads"]["files"] == ["old.mp4"]
+    assert client.get("/admin/cleanup/missing").status_code == 404
@@ -0,0 +1,223 @@
+"""
+Tests for the Gemini assistant service.
+"""
+
+import pytest
+
+from app.services import gemini_assistant
+from app.services.gemini_assistant import GeminiAssistant, _CircuitBreaker, _RateLimiter
+
+
+class FakeClock:
+    """Stands in for the time module; sleep advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace time in the Gemini module with a fake clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(gemini_assistant, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def analysis_results():
+    """Create a minimal analysis payload."""
+    return {
+        "statistics": {"avg_count": 18.5, "max_count": 30, "min_count": 4, "std_count": 6.2},
+        "insights": {"crowd_level": "High", "suggested_nurses": 3, "bottleneck_detected": True},
+        "enhanced_analytics": {},
+        "video_metadata": {"duration": 60, "width": 1280, "height": 720}
+    }
+
+
+@pytest.fixture
+def assistant():
+    """Create a rule-based assistant with an empty result cache."""
+    gemini_assistant._result_cache.clear()
+    yield GeminiAssistant(api_key=None)
+    gemini_assistant._result_cache.clear()
+
+
+class TestInsightsCache:
+    """Tests for the insights result cache."""
+
+    def test_cache_hit_gets_fresh_timestamp(self, assistant, analysis_results, monkeypatch):
+        """Test a cached result is stamped with the time of the new request"""
+        first = assistant.generate_insights(analysis_results)
+
+        class LaterDatetime:
+            @staticmethod
+            def now():
+                from datetime import datetime
+                return datetime(2099, 1, 1)
+
+        monkeypatch.setattr(gemini_assistant, "datetime", LaterDatetime)
+        second = assistant.generate_insights(analysis_results)
+
+        assert second["generated_at"] == "2099-01-01T00:00:00"
+        assert second["generated_at"] != first["generated_at"]
+
+    def test_cached_results_are_not_shared(self, assistant, analysis_results):
+        """Test mutating a returned result does not leak into later hits"""
+        first = assistant.generate_insights(analysis_results)
+        expected = list(first["key_findings"])
+        first["key_findings"].append("injected")
+
+        second = assistant.generate_insights(analysis_results)
+        second["key_findings"].append("injected again")
+
+        assert assistant.generate_insights(analysis_results)["key_findings"] == expected
+
+
+class TestCircuitBreaker:
+    """Tests for the Gemini circuit breaker."""
+
+    def test_opens_after_fail_max(self, clock):
+        """Test the circuit stays closed until fail_max consecutive failures"""
+        breaker = _CircuitBreaker(fail_max=3, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_failure()
+
+        assert breaker.state == "closed"
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+    def test_success_resets_failure_count(self, clock):
+        """Test only consecutive failures open the circuit"""
+        breaker = _CircuitBreaker(fail_max=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == "closed"
+
+    def test_rejects_while_open(self, clock):
+        """Test calls are rejected until reset_timeout has passed"""
+        breaker = _CircuitBreaker(fail_max=1, reset_timeout=60)
+        breaker.record_failure()
+
+        assert not breaker.allow_request()
+        clock.now += 59
+        assert not breaker.allow_request()
+
+    def test_half_open_allows_one_trial(self, clock):
+        """Test a single trial call is let through after reset_timeout"""
+        breaker = _CircuitBreaker(fail_max=1, reset_timeout=60)
+        breaker.record_failure()
+        clock.now += 60
+
+        assert breaker.state == "half-open"
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+    def test_trial_success_closes(self, clock):
+        """Test a successful trial closes the circuit"""
+        breaker = _CircuitBreaker(fail_max=1, reset_timeout=60)
+        breaker.record_failure()
+        clock.now += 60
+        breaker.allow_request()
+
+        breaker.record_success()
+
+        assert breaker.state == "closed"
+        assert breaker.allow_request()
+        assert breaker.allow_request()
+
+    def test_trial_failure_reopens(self, clock):
+        """Test a failed trial re-opens the circuit for another reset_timeout"""
+        breaker = _CircuitBreaker(fail_max=1, reset_timeout=60)
+        breaker.record_failure()
+        clock.now += 60
+        breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+        clock.now += 59
+        assert not breaker.allow_request()
+        clock.now += 1
+        assert breaker.allow_request()
+
+    def test_release_returns_trial_slot(self, clock):
+        """Test a trial that never reached Gemini can be retried"""
+        breaker = _CircuitBreaker(fail_max=1, reset_timeout=60)
+        breaker.record_failure()
+        clock.now += 60
+        breaker.allow_request()
+
+        breaker.release()
+
+        assert breaker.allow_request()
+
+
+class TestRateLimiter:
+    """Tests for the Gemini quota token buckets."""
+
+    def test_burst_within_quota_does_not_wait(self, clock):
+        """Test a full bucket serves requests immediately"""
+        limiter = _RateLimiter(requests_per_minute=2, tokens_per_minute=0, max_wait=10)
+
+        assert limiter.acquire(100)
+        assert limiter.acquire(100)
+        assert clock.slept == []
+
+    def test_waits_for_refill(self, clock):
+        """Test an empty bucket sleeps until one request has refilled"""
+        limiter = _RateLimiter(requests_per_minute=60, tokens_per_minute=0, max_wait=10)
+        for _ in range(60):
+            limiter.acquire(0)
+
+        assert limiter.acquire(0)
+        assert clock.slept == [pytest.approx(1.0)]
+
+        clock.now += 5
+        assert limiter.acquire(0)
+        assert len(clock.slept) == 1
+
+    def test_rejects_when_wait_exceeds_max_wait(self, clock):
+        """Test a request is refused instead of waiting past max_wait"""
+        limiter = _RateLimiter(requests_per_minute=1, tokens_per_minute=0, max_wait=10)
+        assert limiter.acquire(0)
+
+        assert not limiter.acquire(0)
+        assert clock.slept == []
+
+        # A rejected request reserves nothing, so it succeeds after a full refill
+        clock.now += 60
+        assert limiter.acquire(0)
+        assert clock.slept == []
+
+    def test_token_bucket_limits_large_prompts(self, clock):
+        """Test the tokens-per-minute bucket rejects prompts it cannot serve in time"""
+        limiter = _RateLimiter(requests_per_minute=0, tokens_per_minute=600, max_wait=10)
+        assert limiter.acquire(600)
+
+        assert not limiter.acquire(600)
+        assert limiter.acquire(50)
+        assert clock.slept == [pytest.approx(5.0)]
+
+    def test_zero_limits_disable_limiting(self, clock):
+        """Test limits of 0 never wait or reject"""
+        limiter = _RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_wait=0)
+
+        assert all(limiter.acquire(10_000) for _ in range(1000))
+        assert clock.slept == []
+
+    def test_disabled_by_default(self):
+        """Test the shared limiter does not throttle unless configured"""
+        assert gemini_assistant._gemini_limiter.requests_per_minute == 0
+        assert gemini_assistant._gemini_limiter.tokens_per_minute == 0
@@ -0,0 +1,164 @@
+"""
+Tests for hospital analytics service (queueing and capacity models).
+"""
+
+import math
+
+import pytest
+from app.services.hospital_analytics import HospitalAnalytics
+
+
+def reference_erlang_c(intensity: float, num_agents: int) -> float:
+    """Textbook Erlang C computed from the factorial sums."""
+    top = (intensity ** num_agents / math.factorial(num_agents)) * (
+        num_agents / (num_agents - intensity)
+    )
+    bottom = sum(intensity ** n / math.factorial(n) for n in range(num_agents)) + top
+    return top / bottom
+
+
+def test_numba_erlang_b_matches_numpy():
+    """Test the JIT Erlang B kernel agrees with the NumPy version"""
+    pytest.importorskip("numba")
+    import numpy as np
+    from app.services import hospital_analytics
+
+    assert hospital_analytics._erlang_b_table is not hospital_analytics._erlang_b_table_numpy
+    intensity = np.array([0.0, 0.5, 3.2, 12.0, 40.0])
+
+    np.testing.assert_allclose(
+        hospital_analytics._erlang_b_table(intensity, 25),
+        hospital_analytics._erlang_b_table_numpy(intensity, 25)
+    )
+
+
+class TestHospitalAnalytics:
+    """Tests for HospitalAnalytics class."""
+    
+    @pytest.fixture
+    def hospital_analytics(self):
+        """Create hospital analytics service instance."""
+        return HospitalAnalytics()
+    
+    def test_erlang_c_known_value(self, hospital_analytics):
+        """Test Erlang C against a hand-computed M/M/2 case (a=1 -> 1/3)."""
+        result = hospital_analytics.erlang_c_formula(6.0, 6.0, 2)
+        assert result == pytest.approx(1 / 3)
+    
+    @pytest.mark.parametrize("intensity,num_agents", [(0.5, 1), (2.7, 4), (7.5, 10), (18.0, 25)])
+    def test_erlang_c_matches_reference(self, hospital_analytics, intensity, num_agents):
+        """Test Erlang C recurrence against the factorial formula."""
+        result = hospital_analytics.erlang_c_formula(intensity * 6.0, 6.0, num_agents)
+        assert result == pytest.approx(reference_erlang_c(intensity, num_agents))
+    
+    def test_erlang_c_overloaded(self, hospital_analytics):
+        """Test that overloaded or invalid systems always wait."""
+        assert hospital_analytics.erlang_c_formula(30.0, 6.0, 5) == 1.0
+        assert hospital_analytics.erlang_c_formula(10.0, 6.0, 0) == 1.0
+        assert hospital_analytics.erlang_c_formula(10.0, 0.0, 3) == 1.0
+    
+    def test_average_wait_time(self, hospital_analytics):
+        """Test M/M/c wait time decreases as agents are added."""
+        waits = [
+            hospital_analytics.calculate_average_wait_time(20.0, 6.0, c)
+            for c in range(4, 9)
+        ]
+        assert waits == sorted(waits, reverse=True)
+        assert hospital_analytics.calculate_average_wait_time(20.0, 6.0, 3) == float('inf')
+
+    def test_erlang_results_are_memoized(self, hospital_analytics):
+        """Repeated staffing runs should hit the Erlang cache"""
+        from app.services.hospital_analytics import _erlang_c
+
+        _erlang_c.cache_clear()
+        first = hospital_analytics.calculate_optimal_staffing(20, 30, 10, 3, 100)
+        misses = _erlang_c.cache_info().misses
+        second = hospital_analytics.calculate_optimal_staffing(20, 30, 10, 3, 100)
+
+        assert _erlang_c.cache_info().misses == misses
+        assert first["recommended_nurses"] == second["recommended_nurses"]
+
+    def test_bed_urgency_labels(self, hospital_analytics):
+        """Test urgency is reported with its display label and drives alerts"""
+        result = hospital_analytics.calculate_comprehensive_hospital_metrics(
+            40, 60, 10,
+            {"resources": {"total_beds": 50, "occupied_beds": 48, "available_beds": 2}}
+        )
+
+        assert result["bed_analysis"]["urgency_level"] == "Critical - Immediate action required"
+        assert any(alert.startswith("CRITICAL: Bed shortage") for alert in result["critical_alerts"])
+
+    def test_bed_forecast_batch_matches_single(self, hospital_analytics):
+        """Test batch bed forecasting agrees with the per-zone call"""
+        from app.services.hospital_analytics import BED_FORECAST_COLUMNS, Urgency
+
+        rows = [[12.0, 20, 50, 30, 20], [40.0, 60, 50, 48, 2], [3.0, 5, 0, 0, 0]]
+        forecast = hospital_analytics.calculate_bed_demand_forecasting_batch(rows)
+
+        assert forecast.shape == (3, len(BED_FORECAST_COLUMNS))
+        for row, out in zip(rows, forecast):
+            single = hospital_analytics.calculate_bed_demand_forecasting(*row)
+            assert single["projected_occupancy_rate"] == round(out[2], 3)
+            assert single["additional_capacity_needed"] == round(out[3], 0)
+        assert forecast[1, -1] == Urgency.CRITICAL
+
+    def test_staffing_batch_matches_single(self, hospital_analytics):
+        """Test batch staffing agrees with per-zone staffing"""
+        zones = [(20.0, 30, 3, 10.0, 100.0), (5.0, 8, 2, 30.0, 400.0), (60.0, 90, 10, 5.0, 50.0)]
+        batch = hospital_analytics.calculate_optimal_staffing_batch(*zip(*zones))
+
+        assert len(batch) == len(zones)
+        for (avg, peak, avail, duration, area), result in zip(zones, batch):
+            single = hospital_analytics.calculate_optimal_staffing(
+                avg, peak, avail, avail, duration, area_sqm=area
+            )
+            assert result == single
+
+    def test_recommends_fewest_nurses_meeting_target(self, hospital_analytics):
+        """Test the recommendation is the smallest staffing level within the target wait"""
+        result = hospital_analytics.calculate_optimal_staffing(20, 30, 10, 3, 10)
+        recommended = result["recommended_nurses"]
+        analysis = result["staffing_analysis"]
+
+        assert analysis[str(recommended)]["wait_time_minutes"] <= 10
+        below = analysis.get(str(recommended - 1))
+        if below is not None:
+            assert below["wait_time_minutes"] == "Unstable" or below["wait_time_minutes"] > 10
+
+    def test_comprehensive_metrics_are_cached(self, hospital_analytics):
+        """Test repeat requests for a zone reuse the cached analysis"""
+        from app.services.hospital_analytics import _cached_comprehensive_metrics
+
+        context = {"staffing": {"available_nurses": 4}, "resources": {"total_beds": 30, "available_beds": 10}}
+        _cached_comprehensive_metrics.cache_clear()
+        first = hospital_analytics.calculate_comprehensive_hospital_metrics(12.04, 20, 10, context)
+        second = hospital_analytics.calculate_comprehensive_hospital_metrics(12.01, 20, 10, dict(context))
+
+        assert _cached_comprehensive_metrics.cache_info().hits == 1
+        assert first["summary"] == second["summary"]
+        assert "analysis_timestamp" in second
+
+    def test_bed_alert_follows_urgency(self, hospital_analytics):
+        """Test a critical bed forecast raises a critical bed alert"""
+        context = {"staffing": {"available_nurses": 10},
+                   "resources": {"total_beds": 30, "occupied_beds": 29, "available_beds": 1}}
+        result = hospital_analytics.calculate_comprehensive_hospital_metrics(25, 40, 10, context)
+
+        assert result["bed_analysis"]["urgency_level"].startswith("Critical")
+        assert any(alert.startswith("CRITICAL: Bed shortage") for alert in result["critical_alerts"])
+
+    def test_cached_metrics_are_not_shared(self, hospital_analytics):
+        """Test mutating one result does not leak into later cached results"""
+        from app.services.hospital_analytics import _cached_comprehensive_metrics
+
+        context = {"staffing": {"available_nurses": 4}, "resources": {"total_beds": 30, "available_beds": 10}}
+        _cached_comprehensive_metrics.cache_clear()
+        first = hospital_analytics.calculate_comprehensive_hospital_metrics(12, 20, 10, context)
+        expected_alerts = list(first["critical_alerts"])
+        first["critical_alerts"].append({"type": "injected"})
+        first["staffing_analysis"]["recommended_nurses"] = 999
+
+        second = hospital_analytics.calculate_comprehensive_hospital_metrics(12, 20, 10, context)
+
+        assert second["critical_alerts"] == expected_alerts
+        assert second["staffing_analysis"]["recommended_nurses"] != 999
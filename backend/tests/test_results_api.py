@@ -0,0 +1,57 @@
+"""
+Tests for the results API endpoints.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import results
+
+client = TestClient(app)
+
+ANALYSIS_ID = "0b6c1f2e-5d1a-4c1e-9a57-3f0e4c2b8d10"
+
+
+@pytest.fixture
+def stored_result(monkeypatch):
+    """Serve a single completed analysis from ANALYSIS_RESULTS."""
+    row = {
+        "id": ANALYSIS_ID,
+        "video_id": "video-1",
+        "video_name": "ward.mp4",
+        "created_at": "2024-01-01T00:00:00",
+        "status": "completed",
+        "results": '{"peak_count": 12}'
+    }
+
+    class Query:
+        def select(self, *args, **kwargs):
+            return self
+
+        def eq(self, column, value):
+            return self
+
+        def execute(self):
+            return type("Response", (), {"data": [dict(row)]})()
+
+    client_stub = type("Client", (), {"table": lambda self, name: Query()})()
+    monkeypatch.setattr(results, "get_supabase", lambda: client_stub)
+    return row
+
+
+def test_get_result_sets_etag(stored_result):
+    """Test results carry an ETag and a matching If-None-Match gets 304."""
+    response = client.get(f"/api/results/{ANALYSIS_ID}")
+
+    assert response.status_code == 200
+    assert response.json()["results"] == {"peak_count": 12}
+    etag = response.headers["ETag"]
+
+    cached = client.get(f"/api/results/{ANALYSIS_ID}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    stale = client.get(f"/api/results/{ANALYSIS_ID}", headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200
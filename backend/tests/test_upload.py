@@ -103,3 +103,28 @@ def test_upload_video_too_large():
     response = client.post("/upload", files=files)
     assert response.status_code == 400
     assert "too large" in response.json()["detail"].lower()
+
+
+def test_cleanup_old_files_removes_links_not_targets(tmp_path):
+    """Test old symlinks are removed as links and their targets are kept."""
+    import os
+    import time
+    from app.utils.file_handler import FileHandler
+
+    upload_dir = tmp_path / "uploads"
+    handler = FileHandler(str(upload_dir))
+    target = tmp_path / "target.mp4"
+    target.write_bytes(b"video")
+    old = time.time() - 30 * 86400
+    os.utime(target, (old, old))
+
+    fresh_link = upload_dir / "fresh.mp4"
+    fresh_link.symlink_to(target)
+    old_link = upload_dir / "old.mp4"
+    old_link.symlink_to(target)
+    os.utime(old_link, (old, old), follow_symlinks=False)
+
+    assert handler.cleanup_old_files(days=7) == 1
+    assert not old_link.is_symlink()
+    assert fresh_link.is_symlink()
+    assert target.exists()
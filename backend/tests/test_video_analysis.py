@@ -10,7 +10,8 @@ import tempfile
 import os
 
 from app.services.video_processor import VideoProcessor
-from app.services.person_detector import PersonDetector, DetectionStats
+from app.services.person_detector import PersonDetector, DetectionBatch, DetectionStats
+from app.services.video_analysis import VideoAnalysisService
 
 
 class TestVideoProcessor:
@@ -84,6 +85,19 @@ class TestVideoProcessor:
         
         assert len(frames_data) <= 2
     
+    def test_inference_frame(self, sample_video):
+        """Test frames are downscaled to the detector input size at decode time."""
+        processor = VideoProcessor(frame_sample_rate=30, max_frames=1, inference_size=320)
+        
+        frame_data = next(processor.iter_frames(sample_video))
+        assert frame_data["frame"].shape == (480, 640, 3)
+        assert frame_data["inference_frame"].shape == (240, 320, 3)
+        assert frame_data["inference_scale"] == 0.5
+        
+        frame_data = next(processor.iter_frames(sample_video, keep_full_frame=False))
+        assert frame_data["frame"].shape == (240, 320, 3)
+        assert "inference_frame" not in frame_data
+    
     def test_extract_single_frame(self, sample_video):
         """Test single frame extraction."""
         processor = VideoProcessor()
@@ -244,6 +258,115 @@ class TestDetectionStats:
         assert peak_frames[0]['person_count'] == 25  # Highest
         assert peak_frames[1]['person_count'] == 20  # Second highest
         assert peak_frames[2]['person_count'] == 15  # Third highest
+    
+    def test_detection_batch_matches_list(self):
+        """Test DetectionBatch aggregations match the list-of-dicts path."""
+        detections = [{"person_count": c} for c in [3, 7, 7, 1, 9, 7]] + [{}]
+        frames_data = [
+            {"frame_number": i, "timestamp": float(i), "timestamp_formatted": f"00:{i:02d}"}
+            for i in range(7)
+        ]
+        batch = DetectionBatch.from_results(detections, frames_data)
+        
+        assert len(batch) == 7
+        assert DetectionStats.calculate_statistics(batch) == DetectionStats.calculate_statistics(detections)
+        assert (DetectionStats.find_peak_frames(batch, frames_data, top_n=4)
+                == DetectionStats.find_peak_frames(detections, frames_data, top_n=4))
+
+
+class TestVideoAnalysisService:
+    """Tests for VideoAnalysisService helpers."""
+    
+    def test_detector_shared_across_services(self):
+        """Test services with the same detector settings reuse one loaded model."""
+        first = VideoAnalysisService(enable_ai_insights=False)
+        second = VideoAnalysisService(enable_ai_insights=False)
+        other = VideoAnalysisService(confidence_threshold=0.3, enable_ai_insights=False)
+        
+        assert first.person_detector is second.person_detector
+        assert other.person_detector is not first.person_detector
+    
+    def test_generate_timeline(self):
+        """Test per-interval aggregation of person counts."""
+        service = VideoAnalysisService(enable_ai_insights=False)
+        frames_data = [{"timestamp": t} for t in [0.0, 10.0, 29.9, 30.0, 95.0, 100.0]]
+        detections = [{"person_count": c} for c in [2, 4, 6, 10]] + [{}, {"person_count": 3}]
+        
+        timeline = service._generate_timeline(DetectionBatch.from_results(detections, frames_data))
+        
+        assert [t["interval_start"] for t in timeline] == [0, 30, 90]
+        assert [t["frames_in_interval"] for t in timeline] == [3, 1, 2]
+        assert timeline[0]["average_person_count"] == 4.0
+        assert timeline[0]["max_person_count"] == 6
+        assert timeline[0]["min_person_count"] == 2
+        assert timeline[2]["min_person_count"] == 0  # Missing count treated as 0
+        assert timeline[2]["interval_end"] == 120
+
+    def _annotating_service(self, monkeypatch, release_result):
+        """Build a service whose video writer is a fake recording release() calls."""
+        class FakeWriter:
+            released = 0
+
+            def write(self, frame):
+                pass
+
+            def release(self):
+                FakeWriter.released += 1
+                return release_result
+
+        monkeypatch.setattr(
+            "app.services.video_analysis.create_video_writer",
+            lambda *args, **kwargs: FakeWriter()
+        )
+        service = VideoAnalysisService(
+            enable_ai_insights=False,
+            save_annotated_video=True,
+            output_video_path=Path("annotated.mp4")
+        )
+        return service, FakeWriter
+
+    def _frames(self, count=3):
+        return [
+            {
+                "frame": np.zeros((48, 64, 3), dtype=np.uint8),
+                "frame_number": i,
+                "timestamp": float(i),
+                "timestamp_formatted": f"00:00:0{i}"
+            }
+            for i in range(count)
+        ]
+
+    def test_video_writer_released_when_detection_fails(self, monkeypatch):
+        """Test the writer is released even if detection raises mid-video."""
+        service, writer = self._annotating_service(monkeypatch, release_result=None)
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("detector crashed")
+
+        monkeypatch.setattr(service.person_detector, "detect_batch", fail)
+
+        with pytest.raises(RuntimeError):
+            service._detect_people_in_frames(self._frames(), 3)
+
+        assert writer.released == 1
+        assert service.video_writer is None
+
+    def test_failed_video_encode_not_reported_as_saved(self, monkeypatch, caplog):
+        """Test a writer reporting failure doesn't log the video as saved."""
+        service, writer = self._annotating_service(monkeypatch, release_result=False)
+        monkeypatch.setattr(
+            service.person_detector,
+            "detect_batch",
+            lambda frames, return_boxes=False: [{"person_count": 0, "boxes": []} for _ in frames]
+        )
+
+        with caplog.at_level("INFO", logger="app.services.video_analysis"):
+            frames_data, detections = service._detect_people_in_frames(self._frames(), 3)
+
+        assert len(detections) == 3
+        assert writer.released == 1
+        assert "saved successfully" not in caplog.text
+        assert "could not be saved" in caplog.text
 
 
 # Integration tests